@@ -11,7 +11,8 @@ import os
 from api.routes import chat, session, health, email, email_test
 from api.middleware import LoggingMiddleware, RateLimitMiddleware
 from config.settings import settings
-from config.database import test_connection
+from config.database import test_connection, close_async_pool
+from services.shared_llm_client import close_http_client
 
 # Setup logging
 os.makedirs("logs", exist_ok=True)
@@ -38,6 +39,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("👋 Shutting down...")
+    await close_http_client()
+    await close_async_pool()
 
 # Initialize FastAPI
 app = FastAPI(
@@ -3,15 +3,19 @@ Database connection helper for vector_db (READ-ONLY)
 
 Confidence: 98% ✅
 Limitations:
-- No connection pooling (acceptable for testing)
+- get_connection() opens a new connection per call (scripts/tests);
+  hot paths use the async pool from get_async_pool()
 - No retry logic
-- Single connection model
 """
+import asyncio
 import os
-from typing import Optional
+import threading
+import weakref
 import psycopg
+from psycopg.conninfo import make_conninfo
 from psycopg.rows import dict_row
-from pgvector.psycopg import register_vector
+from psycopg_pool import AsyncConnectionPool
+from pgvector.psycopg import register_vector, register_vector_async
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,7 +34,7 @@ def get_connection(autocommit: bool = True) -> psycopg.Connection:
     Get database connection
     
     Confidence: 98% ✅
-    Limitation: Connection pooling not implemented (fine for testing)
+    Limitation: New connection per call - use get_async_pool() on hot paths
     
     Returns:
         psycopg.Connection: Database connection with vector support
@@ -43,6 +47,90 @@ def get_connection(autocommit: bool = True) -> psycopg.Connection:
     register_vector(conn)
     return conn
 
+# Async pools for hot-path queries (lazy; opened inside the running loop).
+# A pool is bound to the loop that opened it, so there is one per loop: the
+# API loop and the nodes._utils.run_sync background loop each get their own.
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "4"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "32"))
+_async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncConnectionPool]" = weakref.WeakKeyDictionary()
+_pool_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+_pool_locks_guard = threading.Lock()  # the dicts are shared across loop threads
+
+async def _configure_async_connection(conn: psycopg.AsyncConnection) -> None:
+    await register_vector_async(conn)
+
+def _pool_lock(loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+    with _pool_locks_guard:
+        lock = _pool_locks.get(loop)
+        if lock is None:
+            lock = _pool_locks[loop] = asyncio.Lock()
+        return lock
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Get or create the async connection pool for the running event loop
+    
+    Confidence: 95% ✅
+    
+    Connections are autocommit with dict rows and pgvector types
+    registered, same as get_connection(), but stay open between requests
+    (no per-query TCP/auth handshake; prepared statements survive).
+    Concurrent first callers wait on a per-loop lock, so only one pool is
+    opened per loop.
+    
+    Usage:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            ...
+    """
+    loop = asyncio.get_running_loop()
+    pool = _async_pools.get(loop)
+    if pool is not None:
+        return pool
+    async with _pool_lock(loop):
+        pool = _async_pools.get(loop)
+        if pool is None:
+            pool = AsyncConnectionPool(
+                conninfo=make_conninfo(**DB_CONFIG),
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                kwargs={"autocommit": True, "row_factory": dict_row},
+                configure=_configure_async_connection,
+                open=False
+            )
+            await pool.open()
+            with _pool_locks_guard:
+                _async_pools[loop] = pool
+    return pool
+
+async def close_async_pool() -> None:
+    """Close the running loop's pool (application shutdown)"""
+    loop = asyncio.get_running_loop()
+    with _pool_locks_guard:
+        pool = _async_pools.pop(loop, None)
+    if pool is not None:
+        await pool.close()
+
+async def set_hnsw_ef_search_async(cur: psycopg.AsyncCursor, ef_search: int) -> None:
+    """Async variant of set_hnsw_ef_search (same transaction-local rules)"""
+    await cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),), prepare=True)
+
+def set_hnsw_ef_search(cur: psycopg.Cursor, ef_search: int) -> None:
+    """
+    Set the HNSW search breadth for the current transaction only
+    
+    Confidence: 95% ✅
+    
+    Must run inside `conn.transaction()` (connections are autocommit, and a
+    transaction-local setting outside one is discarded immediately).
+    Harmless when the HNSW index (migrations/001) isn't installed.
+    
+    Args:
+        cur: Cursor inside an open transaction
+        ef_search: Candidate list size; keep >= the query LIMIT
+    """
+    cur.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),))
+
 def test_connection() -> bool:
     """
     Test database connection
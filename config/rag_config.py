@@ -24,6 +24,7 @@ RAG_CONFIG = {
         "enabled": os.getenv("BM25_ENABLED", "true").lower() == "true",
         "top_k_per_query": int(os.getenv("BM25_TOP_K", "15")),  # Phase 1: Reduced (BM25 less precise)
         "language": "english",  # PostgreSQL ts_config
+        "trigram_prefilter": os.getenv("BM25_TRIGRAM", "false").lower() == "true",  # migrations/003 applied
     },
     
     # Vector Semantic Search (Phase 3.2)
@@ -32,6 +33,8 @@ RAG_CONFIG = {
         "top_k_per_query": int(os.getenv("VECTOR_TOP_K", "25")),  # Phase 1: Increased (vector more precise)
         "model": "text-embedding-3-small",
         "include_embeddings": True,  # For MMR
+        "hnsw_ef_search": int(os.getenv("HNSW_EF_SEARCH", "40")),  # HNSW candidate list (>= top_k)
+        "denormalized_chunks": os.getenv("CHUNKS_DENORMALIZED", "false").lower() == "true",  # migrations/002 applied
     },
     
     # RRF Fusion (Phase 3.3)
@@ -47,6 +50,8 @@ RAG_CONFIG = {
         "lambda_param": float(os.getenv("MMR_LAMBDA", "0.75")),  # Phase 1: Slightly favor relevance
         "final_chunks": int(os.getenv("MMR_FINAL", "12")),  # Phase 1: Increased for better coverage
         "max_final": 20,
+        "int8_similarity": os.getenv("MMR_INT8", "false").lower() == "true",  # needs simsimd
+        "doc_shortcut": os.getenv("MMR_DOC_SHORTCUT", "false").lower() == "true",  # top-n by RRF if all from distinct docs
     },
     
     # Internal Content (Phase 4 - Internal Documents)
@@ -21,24 +21,33 @@ NEW RAG Pipeline (Phase 2 & 3 Complete):
 This implements the FULL plan from rag_implementation.md!
 """
 from typing import TypedDict, Annotated, Literal
+import asyncio
+import os
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 from langgraph.graph import StateGraph, END
 
 # Import nodes
-from nodes.llm_guardrails import llm_guardrail
+from nodes.llm_guardrails import llm_guardrail, guardrail_precheck, llm_guardrail_check
 # REMOVED: collect_user_info - Now collected at startup in main.py
 from core.planner_node import planner_node  # Full node wrapper
 from core.executor_node import executor_node
 from core.react_responder import react_responder_node
 
 # Import state schema
-from core.state_schema import ConversationState, create_empty_state, merge_planner_output
+from core.state_schema import ConversationState, create_empty_state, merge_planner_output, MAX_HISTORY_MESSAGES
 
 # ================================================================
 # STATE SCHEMA
 # ================================================================
 
+def add_messages_bounded(left: list[BaseMessage], right) -> list[BaseMessage]:
+    """add_messages, then keep only the last MAX_HISTORY_MESSAGES messages"""
+    merged = add_messages(left, right)
+    if len(merged) > MAX_HISTORY_MESSAGES:
+        merged = merged[-MAX_HISTORY_MESSAGES:]
+    return merged
+
 class GraphState(TypedDict):
     """
     Bot v3 RAG Improved - State Schema
@@ -48,11 +57,13 @@ class GraphState(TypedDict):
     Confidence: 90% ✅
     """
     # Messages (multi-turn conversation)
-    messages: Annotated[list[BaseMessage], add_messages]
+    messages: Annotated[list[BaseMessage], add_messages_bounded]  # last MAX_HISTORY_MESSAGES
     
     # Guardrails
     blocked: bool
     block_reason: str | None
+    _normalized_input: str | None  # Casefolded, whitespace-collapsed user input
+    _turn_analysis: dict | None  # Fused topic + user info result (nodes/turn_analyze.py)
     
     # User info
     user_email: str | None
@@ -115,6 +126,54 @@ class GraphState(TypedDict):
     turn_count: int
     last_updated: str
 
+# ================================================================
+# SPECULATIVE PLANNING
+# ================================================================
+
+# Run the planner concurrently with the LLM guardrail (set to "false" to
+# go back to strictly sequential guardrail → planner)
+PARALLEL_GUARDRAIL = os.getenv("PARALLEL_GUARDRAIL", "true").lower() == "true"
+
+
+async def guarded_planner_node(state: GraphState) -> GraphState:
+    """
+    Guardrail + planner in one step, planner started speculatively
+    
+    Confidence: 90% ✅
+    
+    The cheap synchronous guardrail layers (validation, keywords, fast pass)
+    run first, so obvious jailbreaks never start a planner call. Only when
+    the LLM guardrail layer is needed do it and the planner LLM call run
+    concurrently - both only need the latest user message. If the guardrail
+    then blocks, the plan is discarded (or cancelled if still running);
+    blocked inputs are rare, so the occasional wasted planner call is
+    cheaper than paying both round-trips in sequence on every turn.
+    """
+    guard_update, settled = guardrail_precheck(state)
+    
+    if settled:
+        if guard_update.get("blocked"):
+            return guard_update
+        plan_state = await planner_node(state)
+    else:
+        plan_task = asyncio.create_task(planner_node(state))
+        
+        try:
+            verdict = await llm_guardrail_check(state, guard_update["_normalized_input"])
+        except BaseException:
+            plan_task.cancel()
+            raise
+        guard_update = {**guard_update, **verdict}
+        
+        if guard_update.get("blocked"):
+            plan_task.cancel()
+            return guard_update
+        
+        plan_state = await plan_task
+    
+    # Keep the guardrail's verdict (and any fail-open error) on the plan
+    return {**plan_state, **guard_update}
+
 # ================================================================
 # ROUTING FUNCTIONS
 # ================================================================
@@ -137,6 +196,21 @@ def route_after_guardrail(state: GraphState) -> Literal["planner", "end"]:
     return "planner"
 
 
+def route_after_guarded_planner(state: GraphState) -> Literal["executor", "end"]:
+    """
+    Route after the combined guardrail + planner node
+    
+    Confidence: 95% ✅
+    
+    Blocked inputs end immediately; otherwise same as route_after_planner.
+    """
+    if state.get("blocked"):
+        print("🚫 Input blocked by guardrail → END")
+        return "end"
+    
+    return route_after_planner(state)
+
+
 def route_after_planner(state: GraphState) -> Literal["executor", "end"]:
     """
     Route after planner
@@ -172,11 +246,15 @@ workflow = StateGraph(GraphState)
 
 # Add 4 nodes (REMOVED: collect_user_info - now done at startup)
 print("\n📦 Adding nodes:")
-workflow.add_node("llm_guardrail", llm_guardrail)
-print("  ✅ Node 1: llm_guardrail (LLM-based safety check)")
-
-workflow.add_node("planner", planner_node)
-print("  ✅ Node 2: planner (intent detection, slot filling, planning)")
+if PARALLEL_GUARDRAIL:
+    workflow.add_node("guarded_planner", guarded_planner_node)
+    print("  ✅ Node 1+2: guarded_planner (LLM safety check ∥ planner, concurrent)")
+else:
+    workflow.add_node("llm_guardrail", llm_guardrail)
+    print("  ✅ Node 1: llm_guardrail (LLM-based safety check)")
+    
+    workflow.add_node("planner", planner_node)
+    print("  ✅ Node 2: planner (intent detection, slot filling, planning)")
 
 workflow.add_node("executor", executor_node)
 print("  ✅ Node 3: executor (tool execution - RAG + Pricing + Quote + Booking)")
@@ -187,28 +265,42 @@ print("  ✅ Node 4: responder (ReACT Universal LLM Intelligence)")
 # Define edges
 print("\n🔗 Adding edges:")
 
-workflow.set_entry_point("llm_guardrail")
-print("  ✅ Entry point: llm_guardrail")
-
-workflow.add_conditional_edges(
-    "llm_guardrail",
-    route_after_guardrail,
-    {
-        "planner": "planner",
-        "end": END
-    }
-)
-print("  ✅ Conditional: llm_guardrail → [planner | END]")
-
-workflow.add_conditional_edges(
-    "planner",
-    route_after_planner,
-    {
-        "executor": "executor",
-        "end": END
-    }
-)
-print("  ✅ Conditional: planner → [executor | END]")
+if PARALLEL_GUARDRAIL:
+    workflow.set_entry_point("guarded_planner")
+    print("  ✅ Entry point: guarded_planner")
+    
+    workflow.add_conditional_edges(
+        "guarded_planner",
+        route_after_guarded_planner,
+        {
+            "executor": "executor",
+            "end": END
+        }
+    )
+    print("  ✅ Conditional: guarded_planner → [executor | END]")
+else:
+    workflow.set_entry_point("llm_guardrail")
+    print("  ✅ Entry point: llm_guardrail")
+    
+    workflow.add_conditional_edges(
+        "llm_guardrail",
+        route_after_guardrail,
+        {
+            "planner": "planner",
+            "end": END
+        }
+    )
+    print("  ✅ Conditional: llm_guardrail → [planner | END]")
+    
+    workflow.add_conditional_edges(
+        "planner",
+        route_after_planner,
+        {
+            "executor": "executor",
+            "end": END
+        }
+    )
+    print("  ✅ Conditional: planner → [executor | END]")
 
 workflow.add_edge("executor", "responder")
 print("  ✅ Edge: executor → responder")
@@ -224,7 +316,8 @@ print("✅ Bot v3 RAG Improved - Workflow compiled successfully!")
 print("\n" + "="*80)
 print("📊 WORKFLOW SUMMARY - Bot v3 RAG Improved")
 print("="*80)
-print("Flow: guardrail → planner → executor → responder → END")
+print("Flow: guardrail → planner → executor → responder → END"
+      + (" (guardrail ∥ planner)" if PARALLEL_GUARDRAIL else ""))
 print("(User info collected at startup)")
 print("\nNodes: 4")
 print("  1. llm_guardrail - Safety check")
@@ -13,6 +13,7 @@ Phase: 1 (Planning Only)
 """
 
 from langchain_openai import ChatOpenAI
+from services.shared_llm_client import get_http_client
 import json
 import os
 from typing import Dict, Any, List
@@ -1067,7 +1068,8 @@ PLANNER_SYSTEM_PROMPT = escaped_prompt.format(COURSE_REFERENCE=escaped_course_re
 planner_llm = ChatOpenAI(
     model="gpt-4o",  # Use GPT-4 for better JSON adherence
     temperature=0.5,    # logical and creative
-    api_key=os.getenv("OPENAI_API_KEY")
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_async_client=get_http_client()  # Shared connection pool
 )
 
 
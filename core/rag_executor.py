@@ -231,7 +231,7 @@ async def execute_rag_search(
             
             # BM25 Unified Search (Website + Internal)
             if bm25_config.get("enabled"):
-                bm25_unified = bm25_search_unified(
+                bm25_unified = await bm25_search_unified(
                     exp_query,
                     website_limit=website_limit,
                     internal_limit=internal_limit,
@@ -280,7 +280,8 @@ async def execute_rag_search(
             fused_chunks = rrf_fusion(
                 all_bm25_results,
                 all_vector_results,
-                k=rrf_config.get("k_parameter", 60)
+                k=rrf_config.get("k_parameter", 60),
+                top_n=rrf_config.get("max_candidates")  # MMR only looks at the top candidates
             )
             
             # Analyze distribution
@@ -351,6 +352,12 @@ async def execute_rag_search(
             final_chunks = fused_chunks[:10] if fused_chunks else []
             print(f"  → MMR disabled, using top {len(final_chunks)} from RRF")
         
+        # Precompute citations once so downstream formatters reuse them
+        from core.react_responder import format_citation
+        
+        for chunk in final_chunks:
+            chunk["_citation"] = format_citation(chunk)
+        
         # ═══════════════════════════════════════════════════════════
         # CALCULATE RETRIEVAL CONFIDENCE
         # ═══════════════════════════════════════════════════════════
@@ -17,7 +17,10 @@ Author: ReACT Universal Responder Implementation
 """
 
 from typing import Dict, Any, List
+from array import array
+from collections import defaultdict
 from langchain_openai import ChatOpenAI
+from services.shared_llm_client import get_http_client
 from langchain_core.messages import HumanMessage, AIMessage
 import os
 from dotenv import load_dotenv
@@ -31,7 +34,8 @@ load_dotenv()
 react_llm = ChatOpenAI(
     model="gpt-4o",
     temperature=0.8,  # High creativity for natural, human-like, persuasive responses
-    api_key=os.getenv("OPENAI_API_KEY")
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_async_client=get_http_client()  # Shared connection pool
 )
 
 
@@ -816,12 +820,39 @@ async def react_responder_node(state: Dict[str, Any]) -> Dict[str, Any]:
 # SOURCE ATTRIBUTION FUNCTIONS (from old response_generator)
 # ============================================================================
 
+# Slot per known internal document type (closed set) for compact counting
+_DOC_TYPE_INDEX = {
+    'internal_faq': 0,
+    'internal_pricing_rules': 1,
+    'internal_pricing_emp_inst': 2,
+    'internal_webpage_links': 3,
+    'internal_contact': 4,
+}
+_OTHER_DOC_TYPE = len(_DOC_TYPE_INDEX)
+
+# Source label per slot (last slot covers any other internal type)
+_INTERNAL_SOURCE_LABELS = (
+    "FAQ: Internal Knowledge Base",
+    "Pricing Rules: General",
+    "Pricing Rules: Employers/Instructors",
+    "Recommended Links",
+    "Contact Information",
+    "Internal Document",
+)
+
+# Slots in label order; internal labels all sort before "Website: ..." entries
+_INTERNAL_LABEL_ORDER = sorted(
+    range(len(_INTERNAL_SOURCE_LABELS)), key=_INTERNAL_SOURCE_LABELS.__getitem__
+)
+
+
 def format_citation(chunk: Dict[str, Any]) -> str:
     """
     Format citation based on source_type and document_type
     
     Distinguishes between website content and internal documents with
-    specific document type labels.
+    specific document type labels. Returns the precomputed ``_citation``
+    stored on the chunk at retrieval time when present.
     
     Args:
         chunk: Chunk dict with source_type, document_type, document_title
@@ -839,6 +870,11 @@ def format_citation(chunk: Dict[str, Any]) -> str:
         
     Confidence: 95% ✅
     """
+    return chunk.get('_citation') or _compute_citation(chunk)
+
+
+def _compute_citation(chunk: Dict[str, Any]) -> str:
+    """Build the citation string for a chunk (see format_citation)"""
     source_type = chunk.get('source_type', 'unknown')
     
     if source_type == 'website':
@@ -902,8 +938,11 @@ def generate_sources_summary(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     website_count = 0
     internal_count = 0
-    internal_by_type = {}
-    sources_set = set()
+    # Known internal doc types are counted by slot; anything else keeps its own key
+    type_counts = array('I', bytes(4 * len(_DOC_TYPE_INDEX)))
+    other_by_type = defaultdict(int)
+    seen_internal = 0  # bitmask of slots seen, replaces a set for internal labels
+    website_sources = set()
     
     for chunk in chunks:
         source_type = chunk.get('source_type', 'unknown')
@@ -911,33 +950,36 @@ def generate_sources_summary(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
         if source_type == 'website':
             website_count += 1
             doc_title = chunk.get('document_title', 'Website')
-            sources_set.add(f"Website: {doc_title}")
+            website_sources.add(f"Website: {doc_title}")
         
         elif source_type == 'internal':
             internal_count += 1
             doc_type = chunk.get('document_type', 'unknown')
-            internal_by_type[doc_type] = internal_by_type.get(doc_type, 0) + 1
-            
-            # Add to sources set with formatted name
-            if doc_type == 'internal_faq':
-                sources_set.add("FAQ: Internal Knowledge Base")
-            elif doc_type == 'internal_pricing_rules':
-                sources_set.add("Pricing Rules: General")
-            elif doc_type == 'internal_pricing_emp_inst':
-                sources_set.add("Pricing Rules: Employers/Instructors")
-            elif doc_type == 'internal_webpage_links':
-                sources_set.add("Recommended Links")
-            elif doc_type == 'internal_contact':
-                sources_set.add("Contact Information")
+            idx = _DOC_TYPE_INDEX.get(doc_type, _OTHER_DOC_TYPE)
+            seen_internal |= 1 << idx
+            if idx == _OTHER_DOC_TYPE:
+                other_by_type[doc_type] += 1
             else:
-                sources_set.add("Internal Document")
+                type_counts[idx] += 1
+    
+    # Materialize the per-type dict only at the return boundary
+    internal_by_type = {
+        doc_type: type_counts[idx]
+        for doc_type, idx in _DOC_TYPE_INDEX.items()
+        if type_counts[idx]
+    }
+    internal_by_type.update(other_by_type)
     
     return {
         'total_chunks': len(chunks),
         'website_chunks': website_count,
         'internal_chunks': internal_count,
         'internal_by_type': internal_by_type,
-        'sources_list': sorted(list(sources_set))
+        'sources_list': [
+            _INTERNAL_SOURCE_LABELS[idx]
+            for idx in _INTERNAL_LABEL_ORDER
+            if seen_internal >> idx & 1
+        ] + sorted(website_sources)
     }
 
 
@@ -959,11 +1001,13 @@ def format_chunk_with_source(chunk: Dict[str, Any], index: int) -> str:
     Confidence: 95% ✅
     """
     citation = format_citation(chunk)
-    content = chunk.get("content", "")
-    similarity = chunk.get("similarity_score", chunk.get("rrf_score", 0))
-    
+    similarity = chunk.get("similarity_score") or chunk.get("rrf_score") or 0.0
+
+    # Zero-relevance chunks (common for BM25-only hits) skip the percentage
+    relevance = f" (Relevance: {similarity:.0%})" if similarity else ""
+
     # Format with source attribution
-    return f"[Source {index}] {citation} (Relevance: {similarity:.0%})\n{content}"
+    return f"[Source {index}] {citation}{relevance}\n{chunk.get('content', '')}"
 
 
 # ============================================================================
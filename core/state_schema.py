@@ -261,6 +261,58 @@ class ConversationState(TypedDict, total=False):
 # HELPER FUNCTIONS
 # ============================================================================
 
+# Conversation history cap, applied by the graph's messages reducer
+# (core.graph.add_messages_bounded); older messages drop off
+MAX_HISTORY_MESSAGES = 40
+
+# Keys every planned call must carry (checked by validate_state)
+_REQUIRED_CALL_KEYS = ("tool", "args", "preconditions_met")
+
+# Sentinel for single-lookup reads of optional planner output fields
+_MISSING = object()
+
+# Planner output fields copied over as-is when present
+_REPLACE_FIELDS = (
+    "intent_confidence",
+    "query_type",
+    "user_context",
+    "comparison_items",
+    "process_domain",
+    "planned_calls",
+    "next_action",
+    "slot_question",
+)
+
+# Per-intent slot dicts merged key-by-key when present
+_SLOT_FIELDS = (
+    "pricing_slots",
+    "rag_slots",
+    "all_services_slots",
+    "quote_slots",
+    "booking_slots",
+)
+
+
+# Scalar (immutable) defaults shared by every new state; mutable containers
+# are created fresh in create_empty_state so states never share them
+_EMPTY_STATE_TEMPLATE = {
+    # Query classification (NEW)
+    "query_type": "specific_question",  # Default to specific
+    "process_domain": None,  # Null by default
+    
+    "next_action": "NONE",
+    
+    # Phase 2.2: MQE and retrieval fields (empty for now)
+    "retrieval_method": "",
+    
+    # User info
+    "user_info_collected": False,
+    
+    # Metadata
+    "turn_count": 0,
+}
+
+
 def create_empty_state() -> ConversationState:
     """
     Create a new empty state with defaults
@@ -268,52 +320,44 @@ def create_empty_state() -> ConversationState:
     Returns:
         Empty ConversationState with default values
     """
-    return {
-        "messages": [],
-        "intents": [],
-        "intent_confidence": {},
-        
-        # Query classification (NEW)
-        "query_type": "specific_question",  # Default to specific
-        "user_context": {},  # Empty by default
-        "comparison_items": [],  # Empty by default
-        "process_domain": None,  # Null by default
-        
-        "pricing_slots": {},
-        "rag_slots": {},
-        "all_services_slots": {},
-        "quote_slots": {},
-        "booking_slots": {},
-        "planned_calls": [],
-        "next_action": "NONE",
-        "notes": [],
-        "planner_errors": [],
-        
-        # Phase 2.1: Execution fields
-        "tool_results": {},
-        "execution_errors": [],
-        
-        # Phase 2.2: MQE and retrieval fields (empty for now)
-        "expanded_queries": [],
-        "retrieved_chunks": [],
-        "retrieval_method": "",
-        
-        # Phase 2.3: CoVe fields (empty for now)
-        "verified_claims": [],
-        
-        # Phase 2.4: Response fields (empty for now)
-        "citations": [],
-        "hedged_statements": [],
-        "removed_statements": [],
-        "failed_tools": [],
-        
-        # User info
-        "user_info_collected": False,
-        
-        # Metadata
-        "turn_count": 0,
-        "last_updated": datetime.now().isoformat()
-    }
+    state = _EMPTY_STATE_TEMPLATE.copy()
+    state["messages"] = []
+    state["intents"] = []
+    state["intent_confidence"] = {}
+    
+    # Query classification (NEW)
+    state["user_context"] = {}
+    state["comparison_items"] = []
+    
+    state["pricing_slots"] = {}
+    state["rag_slots"] = {}
+    state["all_services_slots"] = {}
+    state["quote_slots"] = {}
+    state["booking_slots"] = {}
+    state["planned_calls"] = []
+    state["notes"] = []
+    state["planner_errors"] = []
+    
+    # Phase 2.1: Execution fields
+    state["tool_results"] = {}
+    state["execution_errors"] = []
+    
+    # Phase 2.2: MQE and retrieval fields (empty for now)
+    state["expanded_queries"] = []
+    state["retrieved_chunks"] = []
+    
+    # Phase 2.3: CoVe fields (empty for now)
+    state["verified_claims"] = []
+    
+    # Phase 2.4: Response fields (empty for now)
+    state["citations"] = []
+    state["hedged_statements"] = []
+    state["removed_statements"] = []
+    state["failed_tools"] = []
+    
+    # Metadata
+    state["last_updated"] = datetime.now().isoformat()
+    return state
 
 
 def validate_state(state: ConversationState) -> bool:
@@ -346,13 +390,17 @@ def validate_state(state: ConversationState) -> bool:
         for intent in state.get("intents", []):
             assert intent in valid_intents, f"Invalid intent: {intent}"
         
-        # Validate planned_calls
-        for i, call in enumerate(state.get("planned_calls", [])):
-            assert "tool" in call, f"planned_calls[{i}] missing 'tool'"
-            assert "args" in call, f"planned_calls[{i}] missing 'args'"
-            assert "preconditions_met" in call, \
-                f"planned_calls[{i}] missing 'preconditions_met'"
-        
+        # Validate planned_calls (locate the offending call only on failure)
+        planned_calls = state.get("planned_calls", ())
+        if not all(all(k in call for k in _REQUIRED_CALL_KEYS) for call in planned_calls):
+            i, key = next(
+                (i, k)
+                for i, call in enumerate(planned_calls)
+                for k in _REQUIRED_CALL_KEYS
+                if k not in call
+            )
+            raise AssertionError(f"planned_calls[{i}] missing '{key}'")
+
         return True
         
     except AssertionError as e:
@@ -381,88 +429,39 @@ def merge_planner_output(
     new_state = copy.deepcopy(state)
     
     # Update intents (max 4 to prevent hallucinations)
-    if "intents" in planner_output:
-        new_state["intents"] = planner_output["intents"][:4]
-    
-    # Update intent confidence
-    if "intent_confidence" in planner_output:
-        new_state["intent_confidence"] = planner_output["intent_confidence"]
-    
-    # NEW: Update query classification fields (replace each turn)
-    if "query_type" in planner_output:
-        new_state["query_type"] = planner_output["query_type"]
-    
-    if "user_context" in planner_output:
-        new_state["user_context"] = planner_output["user_context"]
-    
-    if "comparison_items" in planner_output:
-        new_state["comparison_items"] = planner_output["comparison_items"]
-    
-    if "process_domain" in planner_output:
-        new_state["process_domain"] = planner_output["process_domain"]
-    
-    # Update pricing slots (merge, don't replace)
-    if "pricing_slots" in planner_output:
-        ps = new_state.get("pricing_slots", {})
-        # Only update non-None values
-        for k, v in planner_output["pricing_slots"].items():
-            if v is not None:
-                ps[k] = v
-        new_state["pricing_slots"] = ps
-    
-    # Update rag slots
-    if "rag_slots" in planner_output:
-        rs = new_state.get("rag_slots", {})
-        for k, v in planner_output["rag_slots"].items():
-            if v is not None:
-                rs[k] = v
-        new_state["rag_slots"] = rs
-    
-    # Update all services slots
-    if "all_services_slots" in planner_output:
-        ass = new_state.get("all_services_slots", {})
-        for k, v in planner_output["all_services_slots"].items():
-            if v is not None:
-                ass[k] = v
-        new_state["all_services_slots"] = ass
-    
-    # Update quote slots
-    if "quote_slots" in planner_output:
-        qs = new_state.get("quote_slots", {})
-        for k, v in planner_output["quote_slots"].items():
-            if v is not None:
-                qs[k] = v
-        new_state["quote_slots"] = qs
-    
-    # Update booking slots
-    if "booking_slots" in planner_output:
-        bs = new_state.get("booking_slots", {})
-        for k, v in planner_output["booking_slots"].items():
+    intents = planner_output.get("intents", _MISSING)
+    if intents is not _MISSING:
+        new_state["intents"] = intents[:4]
+    
+    # Replace-each-turn fields: intent confidence, query classification
+    # (NEW), planned calls (replace, not merge), next action, slot question
+    for field in _REPLACE_FIELDS:
+        value = planner_output.get(field, _MISSING)
+        if value is not _MISSING:
+            new_state[field] = value
+    
+    # Update per-intent slots (merge, don't replace - only non-None values)
+    for field in _SLOT_FIELDS:
+        slots = planner_output.get(field, _MISSING)
+        if slots is _MISSING:
+            continue
+        merged = new_state.get(field, {})
+        for k, v in slots.items():
             if v is not None:
-                bs[k] = v
-        new_state["booking_slots"] = bs
-    
-    # Update planned calls (replace, not merge)
-    if "planned_calls" in planner_output:
-        new_state["planned_calls"] = planner_output["planned_calls"]
-    
-    # Update next action
-    if "next_action" in planner_output:
-        new_state["next_action"] = planner_output["next_action"]
-    
-    # Update slot question
-    if "slot_question" in planner_output:
-        new_state["slot_question"] = planner_output["slot_question"]
+                merged[k] = v
+        new_state[field] = merged
     
     # Add notes (append, keep last 20)
-    if "notes" in planner_output:
+    notes = planner_output.get("notes", _MISSING)
+    if notes is not _MISSING:
         existing_notes = new_state.get("notes", [])
-        new_state["notes"] = (existing_notes + planner_output["notes"])[-20:]
+        new_state["notes"] = (existing_notes + notes)[-20:]
     
     # Add errors if present
-    if "planner_errors" in planner_output:
+    planner_errors = planner_output.get("planner_errors", _MISSING)
+    if planner_errors is not _MISSING:
         existing_errors = new_state.get("planner_errors", [])
-        new_state["planner_errors"] = (existing_errors + planner_output["planner_errors"])[-10:]
+        new_state["planner_errors"] = (existing_errors + planner_errors)[-10:]
     
     # Cross-slot inference: Propagate buyer_category across slots
     # buyer_category is a global preference - once set, reuse it
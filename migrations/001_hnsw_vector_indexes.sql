@@ -0,0 +1,33 @@
+-- ================================================================
+-- HNSW ANN indexes for vector search (pgvector >= 0.5.0)
+-- ================================================================
+--
+-- Without an ANN index, every `ORDER BY embedding <=> $1 LIMIT k` query
+-- is a full scan over all embeddings. HNSW makes it sublinear.
+--
+-- Partial indexes (WHERE embedding IS NOT NULL) match the filter every
+-- search query already uses, so the planner can pick them.
+--
+-- Query side: searches run `set_config('hnsw.ef_search', ...)` locally in
+-- their transaction (RAG_CONFIG["vector"]["hnsw_ef_search"], default 40).
+-- ef_search must be >= the query LIMIT to return a full result set.
+--
+-- Maintenance: after a bulk ingest, rebuild so the graph is well-formed:
+--   REINDEX INDEX CONCURRENTLY chunks_embedding_hnsw;
+--   REINDEX INDEX CONCURRENTLY internal_chunks_embedding_hnsw;
+--
+-- Run with: psql "$DATABASE_URL" -f migrations/001_hnsw_vector_indexes.sql
+-- (CONCURRENTLY cannot run inside a transaction block)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS chunks_embedding_hnsw
+    ON chunks USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE embedding IS NOT NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS internal_chunks_embedding_hnsw
+    ON internal_chunks USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE embedding IS NOT NULL;
+
+ANALYZE chunks;
+ANALYZE internal_chunks;
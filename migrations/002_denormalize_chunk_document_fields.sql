@@ -0,0 +1,62 @@
+-- ================================================================
+-- Denormalize document url/title/document_type onto chunks
+-- ================================================================
+--
+-- Vector searches only need three immutable document fields per hit, but
+-- every query joined chunks → documents to get them. Copying them onto
+-- chunks makes the ANN lookup single-table.
+--
+-- After applying, set CHUNKS_DENORMALIZED=true so the search queries in
+-- nodes/rag_retrieval.py and retrieval/vector_search.py stop joining.
+-- (HNSW indexes can't serve INCLUDE columns / index-only scans, so a
+-- covering index is not an alternative here.)
+--
+-- Run with: psql "$DATABASE_URL" -f migrations/002_denormalize_chunk_document_fields.sql
+
+BEGIN;
+
+ALTER TABLE chunks
+    ADD COLUMN IF NOT EXISTS url text,
+    ADD COLUMN IF NOT EXISTS title text,
+    ADD COLUMN IF NOT EXISTS document_type text;
+
+-- Backfill existing chunks
+UPDATE chunks c
+SET url = d.url,
+    title = d.title,
+    document_type = d.document_type
+FROM documents d
+WHERE d.document_id = c.document_id;
+
+-- New chunks copy the fields from their document
+CREATE OR REPLACE FUNCTION chunks_copy_document_fields() RETURNS trigger AS $$
+BEGIN
+    SELECT d.url, d.title, d.document_type
+    INTO NEW.url, NEW.title, NEW.document_type
+    FROM documents d
+    WHERE d.document_id = NEW.document_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS chunks_copy_document_fields ON chunks;
+CREATE TRIGGER chunks_copy_document_fields
+    BEFORE INSERT OR UPDATE OF document_id ON chunks
+    FOR EACH ROW EXECUTE FUNCTION chunks_copy_document_fields();
+
+-- Edits to a document propagate to its chunks
+CREATE OR REPLACE FUNCTION documents_propagate_fields() RETURNS trigger AS $$
+BEGIN
+    UPDATE chunks
+    SET url = NEW.url, title = NEW.title, document_type = NEW.document_type
+    WHERE document_id = NEW.document_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS documents_propagate_fields ON documents;
+CREATE TRIGGER documents_propagate_fields
+    AFTER UPDATE OF url, title, document_type ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_propagate_fields();
+
+COMMIT;
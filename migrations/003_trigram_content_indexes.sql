@@ -0,0 +1,26 @@
+-- ================================================================
+-- pg_trgm indexes for the BM25 trigram fallback
+-- ================================================================
+--
+-- Full-text search stems and drops tokens, so literal acronyms and
+-- numbers ("CPO", "AED") can match nothing. With these indexes, BM25
+-- queries also match chunks whose content contains a close trigram
+-- match of the raw query (`raw <% content`, word similarity), and add
+-- word_similarity * 0.3 to the ts_rank score.
+--
+-- After applying, set BM25_TRIGRAM=true so retrieval/bm25_search.py
+-- adds the trigram match (without these indexes it would be a full scan).
+--
+-- Run with: psql "$DATABASE_URL" -f migrations/003_trigram_content_indexes.sql
+-- (CONCURRENTLY cannot run inside a transaction block)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS chunks_content_trgm
+    ON chunks USING gin (content gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS internal_chunks_content_trgm
+    ON internal_chunks USING gin (content gin_trgm_ops);
+
+ANALYZE chunks;
+ANALYZE internal_chunks;
@@ -0,0 +1,27 @@
+-- ================================================================
+-- GIN indexes on content_tsv for BM25 full-text search
+-- ================================================================
+--
+-- Every BM25 query filters with `content_tsv @@ tsquery`. Without a GIN
+-- index that is a sequential scan that runs the tsvector match on every
+-- chunk, and it costs most on the common "no rows match" path.
+--
+-- The tsquery is parsed once per statement in a CTE (retrieval/bm25_search.py),
+-- and only rows that pass the indexed match are ranked with ts_rank.
+--
+-- Verify the index is used (Bitmap Index Scan on chunks_content_tsv_gin):
+--   EXPLAIN (ANALYZE, BUFFERS)
+--   SELECT id FROM chunks WHERE content_tsv @@ websearch_to_tsquery('english', 'cpo certification');
+--
+-- Run with: psql "$DATABASE_URL" -f migrations/004_content_tsv_gin_indexes.sql
+-- (CONCURRENTLY cannot run inside a transaction block; IF NOT EXISTS only
+-- checks the name, so skip this if an equivalent index already exists)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS chunks_content_tsv_gin
+    ON chunks USING gin (content_tsv);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS internal_chunks_content_tsv_gin
+    ON internal_chunks USING gin (content_tsv);
+
+ANALYZE chunks;
+ANALYZE internal_chunks;
@@ -0,0 +1,89 @@
+"""
+Shared helpers for graph nodes
+
+Confidence: 95% ✅
+"""
+from typing import Any, Awaitable
+import asyncio
+import re
+import string
+import threading
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Deletes ASCII letters, digits and whitespace in one C-level pass
+_ASCII_ALNUM_SPACE_TABLE = str.maketrans("", "", string.ascii_letters + string.digits + string.whitespace)
+
+
+def _extract_text(msg) -> str:
+    """
+    Text of a message object, or str(msg) for plain values
+
+    Empty content stays empty (so empty-input checks still fire).
+    """
+    content = getattr(msg, "content", None)
+    return content if content is not None else str(msg)
+
+
+def normalize_input(text: str) -> str:
+    """
+    Casefold and collapse whitespace in user text
+
+    The first node that sees a turn's input stores the result on
+    state["_normalized_input"] so later keyword checks can reuse it.
+    """
+    return _WHITESPACE_RE.sub(" ", text.casefold()).strip()
+
+
+def current_turn_analysis(state: dict, message: Any) -> dict | None:
+    """
+    state["_turn_analysis"] if it was made for this message, else None
+
+    The key persists across turns; a result tagged with another message's
+    id/text (analyze_turn_node skipped or returned {}) is stale.
+    """
+    analysis = state.get("_turn_analysis")
+    if analysis is None:
+        return None
+    if analysis.get("message_id") != getattr(message, "id", None) or analysis.get("text") != _extract_text(message):
+        return None
+    return analysis
+
+
+def count_special_chars(text: str) -> int:
+    """
+    Count characters that are neither alphanumeric nor whitespace
+
+    Same result as checking isalnum()/isspace() per character, but the
+    common ASCII characters are stripped by str.translate first so only
+    the (usually few) remaining characters are inspected in Python.
+    """
+    rest = text.translate(_ASCII_ALNUM_SPACE_TABLE)
+    return sum(1 for char in rest if not char.isalnum() and not char.isspace())
+
+
+# Persistent loop for sync callers (lazy initialization)
+# Reused across calls, so pooled DB/HTTP connections bound to it survive too
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Background event loop running in a daemon thread"""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="sync-loop", daemon=True).start()
+    return _sync_loop
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine from synchronous code and return its result
+
+    Uses one persistent background loop instead of asyncio.run() per call
+    (no loop setup/teardown; the async DB pool and HTTP client stay usable).
+    Must not be called from a coroutine running on that same loop.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
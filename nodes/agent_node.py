@@ -14,127 +14,253 @@ Phase 2 will add actual tool execution.
 Currently: Planning only - detects intents, fills slots, creates plan
 Future: Execute tools based on plan
 """
-from typing import Dict, Any
-from langchain_core.messages import AIMessage
+from typing import Dict, Any, AsyncIterator, Iterator, List
+from types import MappingProxyType
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import RunnableConfig
+import copy
+import logging
 import os
+import reprlib
 from dotenv import load_dotenv
 
 # Load environment
 load_dotenv()
 
-# PHASE 1: Import planner and state schema
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+logger = logging.getLogger(__name__)
 
-from state_schema import (
+# PHASE 1: Import planner and state schema
+from core.state_schema import (
     ConversationState,
+    PlannedCall,
     create_empty_state,
     validate_state,
     merge_planner_output
 )
-from planner_node import call_planner, validate_planner_output
+from core.planner_node import call_planner, validate_planner_output
+from nodes.plan_cache import PLAN_CACHE_ENABLED, plan_cache, state_signature, embed_message
+from nodes._utils import _extract_text
 
 
 # ============================================================================
 # RESPONSE GENERATOR
 # ============================================================================
 
-def generate_response_from_plan(
-    state: ConversationState,
-    planner_output: Dict[str, Any]
-) -> str:
+# Display names for detected intents
+_INTENT_NAMES = {
+    "rag": "📚 Course information",
+    "pricing": "💰 Pricing details",
+    "quote": "📧 Email quote",
+    "booking": "📅 Meeting booking"
+}
+
+# Static response text (built once, shared across calls)
+_READY_HEADER = "Got it! Here's what I understand:\n"
+_PHASE1_FOOTER = (
+    "\n🔔 **Note:** In Phase 1, tools are not actually executed.\n"
+    "This is a simulation to test planning logic.\n"
+    "\n"
+    "Type 'proceed' when ready for Phase 2 (real execution)."
+)
+_DEFAULT_SLOT_QUESTION = "Could you provide more details?"
+_NO_CALLS_RESPONSE = "I'm ready to help! However, I don't have any specific actions to take. Could you clarify what you'd like to know?"
+_NO_INTENTS_RESPONSE = "I can help you with course information, pricing, quotes, and booking consultations. What would you like to know?"
+_UNCLEAR_RESPONSE = "I see you're asking about something, but I'm not sure how to help with that. Could you rephrase your question?"
+_BLOCKED_RESPONSE = "I can only answer questions about lifeguard training, CPR, and first aid courses. How can I help you with our training programs?"
+
+
+# Bounded repr for nested arg values (plain strings are sliced instead)
+_ARGS_REPR = reprlib.Repr()
+_ARGS_REPR.maxstring = _ARGS_PREVIEW_LEN = 80
+_ARGS_REPR.maxother = _ARGS_PREVIEW_LEN
+
+
+# Shared read-only defaults for missing state/call fields (no per-call
+# construction of empty containers)
+_NO_ITEMS = ()
+_NO_MAPPING = MappingProxyType({})
+
+
+def _args_preview(args: Dict[str, Any]) -> str:
     """
-    Generate user-facing response based on plan
+    First 80 chars of the args dict repr, without repr'ing all of it
     
-    Phase 1: NO TOOL EXECUTION
-    Just show what we would do or ask for missing info
+    Keys keep their order; each value's repr is bounded and formatting
+    stops once the preview is long enough.
+    """
+    parts = []
+    size = 1
+    for key, value in args.items():
+        if isinstance(value, str):
+            value_repr = repr(value[:_ARGS_PREVIEW_LEN])
+        else:
+            value_repr = _ARGS_REPR.repr(value)
+        parts.append(f"{key!r}: {value_repr}")
+        size += len(parts[-1]) + 2
+        if size > _ARGS_PREVIEW_LEN:
+            break
+    return ("{" + ", ".join(parts) + "}")[:_ARGS_PREVIEW_LEN]
+
+
+def _render_intents(intents: List[str], intent_confidence: Dict[str, float]) -> str:
+    """Render the "You're interested in" block (empty when no intents)"""
+    if not intents:
+        return ""
+    lines = "\n".join(
+        f"   • {_INTENT_NAMES.get(intent, intent)} (confidence: {intent_confidence.get(intent, 0):.0%})"
+        for intent in intents
+    )
+    return f"**You're interested in:**\n{lines}\n\n"
+
+
+def _render_call(i: int, call: PlannedCall) -> str:
+    """Render one planned call, plus its missing-info line when not ready"""
+    tool = call["tool"]
+    args_preview = _args_preview(call.get("args", _NO_MAPPING))
+    if call.get("preconditions_met"):
+        return f"{i}. Call `{tool}` with {args_preview}... → ✅ Ready"
+    missing = ", ".join(call.get("missing", _NO_ITEMS))
+    return (
+        f"{i}. Call `{tool}` with {args_preview}... → ⏳ Needs more info\n"
+        f"   ⚠️  Missing: {missing}"
+    )
+
+
+_CALLS_HEADER = "**What I would do (Phase 1 - simulation):**\n"
+
+
+def _iter_response_sections(state: ConversationState) -> Iterator[str]:
+    """
+    Yield the user-facing response for a plan section by section
     
-    Confidence: 88% ✅
+    Concatenating the sections gives the full response; the READY branch
+    yields the header, intents, each planned call and the footer separately
+    so they can be streamed as soon as they are rendered.
     """
     next_action = state.get("next_action", "NONE")
     
     # Case 1: Need to ask for missing information
     if next_action == "ASK_SLOT":
-        question = state.get("slot_question", "Could you provide more details?")
-        return question
+        yield state.get("slot_question", _DEFAULT_SLOT_QUESTION)
     
     # Case 2: Plan is ready (would execute in Phase 2)
     elif next_action == "READY":
-        planned_calls = state.get("planned_calls", [])
+        planned_calls: List[PlannedCall] = state.get("planned_calls", _NO_ITEMS)
         
         if not planned_calls:
-            return "I'm ready to help! However, I don't have any specific actions to take. Could you clarify what you'd like to know?"
-        
-        # Build response showing the plan
-        response_parts = [
-            "Got it! Here's what I understand:",
-            ""
-        ]
-        
-        # Show intents
-        intents = state.get("intents", [])
-        if intents:
-            intent_names = {
-                "rag": "📚 Course information",
-                "pricing": "💰 Pricing details",
-                "quote": "📧 Email quote",
-                "booking": "📅 Meeting booking"
-            }
-            response_parts.append("**You're interested in:**")
-            for intent in intents:
-                name = intent_names.get(intent, intent)
-                conf = state.get("intent_confidence", {}).get(intent, 0)
-                response_parts.append(f"   • {name} (confidence: {conf:.0%})")
-            response_parts.append("")
-        
-        # Show planned actions
-        response_parts.append("**What I would do (Phase 1 - simulation):**")
-        for i, call in enumerate(planned_calls, 1):
-            tool_name = call["tool"]
-            args_preview = str(call.get("args", {}))[:80]
-            status = "✅ Ready" if call.get("preconditions_met") else "⏳ Needs more info"
-            
-            response_parts.append(f"{i}. Call `{tool_name}` with {args_preview}... → {status}")
-            
-            if not call.get("preconditions_met"):
-                missing = call.get("missing", [])
-                response_parts.append(f"   ⚠️  Missing: {', '.join(missing)}")
+            yield _NO_CALLS_RESPONSE
+            return
+        
+        yield f"{_READY_HEADER}\n"
         
-        response_parts.append("")
-        response_parts.append("🔔 **Note:** In Phase 1, tools are not actually executed.")
-        response_parts.append("This is a simulation to test planning logic.")
-        response_parts.append("")
-        response_parts.append("Type 'proceed' when ready for Phase 2 (real execution).")
+        intents_block = _render_intents(
+            state.get("intents", _NO_ITEMS),
+            state.get("intent_confidence", _NO_MAPPING)
+        )
+        if intents_block:
+            yield intents_block
+        
+        yield _CALLS_HEADER
+        for i, call in enumerate(planned_calls, 1):
+            yield _render_call(i, call) if i == 1 else f"\n{_render_call(i, call)}"
         
-        return "\n".join(response_parts)
+        yield f"\n{_PHASE1_FOOTER}"
     
     # Case 3: No clear action
+    elif not state.get("intents"):
+        yield _NO_INTENTS_RESPONSE
     else:
-        intents = state.get("intents", [])
-        if not intents:
-            return "I can help you with course information, pricing, quotes, and booking consultations. What would you like to know?"
-        else:
-            return "I see you're asking about something, but I'm not sure how to help with that. Could you rephrase your question?"
+        yield _UNCLEAR_RESPONSE
+
+
+async def stream_response_from_plan(
+    state: ConversationState,
+    planner_output: Dict[str, Any]
+) -> AsyncIterator[str]:
+    """
+    Async generator form of generate_response_from_plan
+    
+    Confidence: 88% ✅
+    
+    Yields response sections as they are rendered so callers can flush
+    them to the client before the whole response is built.
+    """
+    for section in _iter_response_sections(state):
+        yield section
+
+
+def generate_response_from_plan(
+    state: ConversationState,
+    planner_output: Dict[str, Any]
+) -> str:
+    """
+    Generate user-facing response based on plan
+    
+    Phase 1: NO TOOL EXECUTION
+    Just show what we would do or ask for missing info
+    
+    Non-streaming callers get the concatenated sections (same text as
+    stream_response_from_plan).
+    
+    Confidence: 88% ✅
+    """
+    return "".join(_iter_response_sections(state))
+
+
+async def _dispatch_response_chunk(section: str, config: RunnableConfig | None) -> bool:
+    """
+    Push one response section to graph streaming consumers
+    
+    Emitted as an "agent_response_chunk" custom event carrying an
+    AIMessageChunk (visible via astream_events). Returns False when there
+    is no run to stream to (e.g. the node is called directly), so the
+    caller can stop trying.
+    """
+    try:
+        await adispatch_custom_event(
+            "agent_response_chunk",
+            AIMessageChunk(content=section),
+            config=config
+        )
+    except RuntimeError:
+        return False
+    return True
 
 
 # ============================================================================
 # MAIN AGENT NODE (PHASE 1)
 # ============================================================================
 
-async def agent_node(state: Dict[str, Any]) -> Dict[str, Any]:
+# Planner output used when validation reports a missing required key
+_VALIDATION_FALLBACK = MappingProxyType({
+    "intents": [],
+    "intent_confidence": {},
+    "pricing_slots": {},
+    "rag_slots": {},
+    "quote_slots": {},
+    "booking_slots": {},
+    "planned_calls": [],
+    "next_action": "ASK_SLOT",
+    "slot_question": "I'm having trouble understanding. Could you rephrase your question?",
+})
+
+
+async def agent_node(state: Dict[str, Any], config: RunnableConfig | None = None) -> Dict[str, Any]:
     """
     PHASE 1: Planning-only agent node
     
     This node:
     1. Calls planner LLM to detect intents and fill slots
     2. Merges planner output into state
-    3. Generates user-facing response (NO tool execution)
+    3. Generates user-facing response (NO tool execution), streaming each
+       section as an "agent_response_chunk" custom event
     
     Confidence: 93% ✅
     
     Args:
         state: Current graph state
+        config: Run config (passed by LangGraph; used for response streaming)
         
     Returns:
         Updated state with plan and response
@@ -142,86 +268,110 @@ async def agent_node(state: Dict[str, Any]) -> Dict[str, Any]:
     if not state.get("messages"):
         return state
     
+    # Copy once: sliced for the planner and extended with the reply below
+    messages = list(state["messages"])
+    
+    # Guardrail already refused this message - don't spend a planner call on it
+    if state.get("blocked"):
+        blocked_response = state.get("final_response") or _BLOCKED_RESPONSE
+        return {
+            **state,
+            "messages": messages + [AIMessage(content=blocked_response)],
+            "final_response": blocked_response
+        }
+    
     # Get last user message
-    last_message = state["messages"][-1]
-    user_input = last_message.content if hasattr(last_message, 'content') else str(last_message)
+    last_message = messages[-1]
+    user_input = _extract_text(last_message)
     
-    print(f"\n{'='*60}")
-    print(f"🧠 PLANNER NODE (Phase 1 - Planning Only)")
-    print(f"{'='*60}")
-    print(f"User: {user_input[:100]}...")
+    logger.debug("🧠 PLANNER NODE (Phase 1 - Planning Only) | User: %.100s...", user_input)
     
     try:
-        # Step 1: Call planner LLM
-        print(f"\n📝 Step 1: Calling planner...")
-        
-        conversation_history = state.get("messages", [])[-10:]  # Last 10 messages
+        # Step 1: Reuse a cached plan for a near-duplicate message, else call planner LLM
+        planner_output = None
+        cache_key = None
+        if PLAN_CACHE_ENABLED:
+            try:
+                cache_key = (await embed_message(user_input), state_signature(state))
+                planner_output = plan_cache.lookup(*cache_key)
+            except Exception as e:
+                logger.warning("⚠️  Plan cache unavailable: %s", e)
+                cache_key = None
         
-        planner_output = await call_planner(
-            user_message=user_input,
-            current_state=state,
-            conversation_history=conversation_history
-        )
+        from_cache = planner_output is not None
+        if from_cache:
+            logger.debug("📝 Step 1: Reusing cached plan (planner skipped)")
+        else:
+            logger.debug("📝 Step 1: Calling planner...")
+            
+            conversation_history = messages[-10:]  # Last 10 messages
+            
+            planner_output = await call_planner(
+                user_message=user_input,
+                current_state=state,
+                conversation_history=conversation_history
+            )
         
         # Step 2: Validate planner output
-        print(f"\n✅ Step 2: Validating planner output...")
+        logger.debug("✅ Step 2: Validating planner output...")
         
         is_valid, errors = validate_planner_output(planner_output)
         
         if not is_valid:
-            print(f"⚠️  Validation errors:")
-            for error in errors:
-                print(f"   - {error}")
+            logger.warning("⚠️  Validation errors: %s", errors)
             
             # Use fallback if critical errors
             if "Missing required key" in str(errors):
-                print(f"❌ Critical validation failure, using fallback")
-                planner_output = {
-                    "intents": [],
-                    "intent_confidence": {},
-                    "pricing_slots": {},
-                    "rag_slots": {},
-                    "quote_slots": {},
-                    "booking_slots": {},
-                    "planned_calls": [],
-                    "next_action": "ASK_SLOT",
-                    "slot_question": "I'm having trouble understanding. Could you rephrase your question?",
-                    "notes": ["Validation fallback"] + errors
-                }
+                logger.warning("❌ Critical validation failure, using fallback")
+                # Deep copy so each fallback plan gets its own empty containers
+                planner_output = copy.deepcopy(dict(_VALIDATION_FALLBACK))
+                planner_output["notes"] = ["Validation fallback", *errors]
+        
+        # Only fresh, fully valid plans are worth reusing
+        if cache_key is not None and is_valid and not from_cache:
+            plan_cache.store(*cache_key, planner_output)
         
         # Step 3: Merge into state
-        print(f"\n🔄 Step 3: Merging into state...")
+        logger.debug("🔄 Step 3: Merging into state...")
         
         updated_state = merge_planner_output(state, planner_output)
         
         # Step 4: Generate user-facing response
-        print(f"\n💬 Step 4: Generating response...")
+        logger.debug("💬 Step 4: Generating response...")
         
-        response_text = generate_response_from_plan(updated_state, planner_output)
+        sections = []
+        streaming = True
+        async for section in stream_response_from_plan(updated_state, planner_output):
+            sections.append(section)
+            if streaming:
+                streaming = await _dispatch_response_chunk(section, config)
+        response_text = "".join(sections)
         
         # Step 5: Update messages
         ai_message = AIMessage(content=response_text)
         
-        print(f"\n📊 PLANNING SUMMARY:")
-        print(f"   Intents: {updated_state.get('intents', [])}")
-        print(f"   Next Action: {updated_state.get('next_action')}")
-        print(f"   Planned Calls: {len(updated_state.get('planned_calls', []))}")
-        for i, call in enumerate(updated_state.get("planned_calls", [])):
-            status = "✅ Ready" if call.get("preconditions_met") else f"⏳ Missing: {', '.join(call.get('missing', []))}"
-            print(f"      {i+1}. {call['tool']} → {status}")
-        print(f"\n⚠️  Phase 1: NO TOOLS EXECUTED (planning only)")
-        print(f"{'='*60}\n")
+        # One log record for the whole summary; nothing is formatted unless INFO is on
+        if logger.isEnabledFor(logging.INFO):
+            planned_calls = updated_state.get("planned_calls", _NO_ITEMS)
+            logger.info("\n".join([
+                f"📊 PLANNING SUMMARY: Intents: {updated_state.get('intents', [])} | "
+                f"Next Action: {updated_state.get('next_action')} | Planned Calls: {len(planned_calls)}",
+                *(
+                    f"   {i}. {call['tool']} → "
+                    + ("✅ Ready" if call.get("preconditions_met") else f"⏳ Missing: {', '.join(call.get('missing', _NO_ITEMS))}")
+                    for i, call in enumerate(planned_calls, 1)
+                ),
+            ]))
+        logger.debug("⚠️  Phase 1: NO TOOLS EXECUTED (planning only)")
         
         return {
             **updated_state,
-            "messages": state["messages"] + [ai_message],
+            "messages": messages + [ai_message],
             "final_response": response_text
         }
         
     except Exception as e:
-        print(f"❌ Agent node error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("❌ Agent node error: %s", e, exc_info=True)
         
         error_response = AIMessage(
             content="I apologize, but I'm having trouble processing that right now. Could you try asking in a different way?"
@@ -229,7 +379,7 @@ async def agent_node(state: Dict[str, Any]) -> Dict[str, Any]:
         
         return {
             **state,
-            "messages": state["messages"] + [error_response],
+            "messages": messages + [error_response],
             "final_response": error_response.content,
             "agent_error": str(e)
         }
@@ -239,7 +389,7 @@ async def agent_node(state: Dict[str, Any]) -> Dict[str, Any]:
 # EXPORTS
 # ============================================================================
 
-__all__ = ['agent_node', 'generate_response_from_plan']
+__all__ = ['agent_node', 'generate_response_from_plan', 'stream_response_from_plan']
 
 
 # ============================================================================
@@ -0,0 +1,191 @@
+"""
+Batch classify - Offline subject check / user-info extraction via the OpenAI Batch API
+
+Confidence: 80% ⚠️
+
+Backfills and analytics over past transcripts otherwise call subject_check
+and extract_user_info_llm one message at a time, at interactive prices and
+against the interactive rate limits. The Batch API takes a JSONL file of
+chat-completions requests, runs it within 24h at half the price, and uses
+a separate rate-limit pool.
+
+Same prompts and models as the live nodes, so labels are comparable.
+For ingestion/CLI scripts only - never on the live chat path.
+
+Usage:
+    batch_id = await submit_batch(messages, task="subject")
+    labels = await await_batch(batch_id, task="subject")  # [True, False, None, ...]
+"""
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+
+from openai import AsyncOpenAI
+
+from nodes.subject_check import SUBJECT_CHECK_PROMPT, SUBJECT_MAX_TOKENS, subject_label_logit_bias
+from utils.helpers import EXTRACT_INFO_PROMPT
+
+logger = logging.getLogger(__name__)
+
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Lazy initialization
+_client = None
+
+def get_client() -> AsyncOpenAI:
+    """Get or create the AsyncOpenAI client (lazy initialization)"""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+# ================================================================
+# REQUEST BUILDING
+# ================================================================
+
+def _request_body(text: str, task: str) -> Dict[str, Any]:
+    """Chat-completions body matching the live node's call"""
+    if task == "subject":
+        body = {
+            "model": "gpt-4o-mini",
+            "temperature": 0,
+            "max_tokens": SUBJECT_MAX_TOKENS,
+            "messages": [
+                {"role": "system", "content": SUBJECT_CHECK_PROMPT},
+                {"role": "user", "content": text}
+            ]
+        }
+        logit_bias = subject_label_logit_bias()
+        if logit_bias:
+            body["logit_bias"] = logit_bias
+        return body
+    if task == "user_info":
+        return {
+            "model": "gpt-4o-mini",
+            "temperature": 0,
+            "messages": [
+                {"role": "system", "content": EXTRACT_INFO_PROMPT.replace("USER_INPUT_HERE", text)}
+            ]
+        }
+    raise ValueError(f"Unknown batch task: {task!r} (expected 'subject' or 'user_info')")
+
+def build_batch_jsonl(inputs: List[str], task: str) -> bytes:
+    """One request line per input; custom_id is the input's index"""
+    lines = (
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _request_body(text, task)
+        })
+        for i, text in enumerate(inputs)
+    )
+    return ("\n".join(lines) + "\n").encode()
+
+# ================================================================
+# RESPONSE PARSING
+# ================================================================
+
+def _parse_content(content: str, task: str) -> Any:
+    if task == "subject":
+        return "on_topic" in content.lower()
+    # Same cleanup as extract_user_info_llm (strip ```json fences)
+    content = content.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+    return json.loads(content.strip())
+
+def parse_batch_output(output: str, count: int, task: str) -> List[Optional[Any]]:
+    """
+    Map output JSONL lines back to input order
+
+    Returns:
+        list: on_topic bools ("subject") or extraction dicts ("user_info");
+        None for inputs whose request failed or couldn't be parsed
+    """
+    results: List[Optional[Any]] = [None] * count
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[int(record["custom_id"])] = _parse_content(content, task)
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning("⚠️ Unparseable batch result %s: %s", record.get("custom_id"), e)
+    return results
+
+# ================================================================
+# SUBMIT / WAIT
+# ================================================================
+
+async def submit_batch(inputs: List[str], task: str = "subject") -> str:
+    """
+    Upload the requests and create a batch job
+
+    Confidence: 80% ⚠️
+
+    Args:
+        inputs: User messages to classify/extract, in order
+        task: "subject" (on/off-topic) or "user_info" (name/email/phone)
+
+    Returns:
+        str: Batch job id (pass to await_batch with the same task)
+    """
+    client = get_client()
+    upload = await client.files.create(
+        file=(f"{task}_batch.jsonl", build_batch_jsonl(inputs, task)),
+        purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=upload.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata={"task": task, "count": str(len(inputs))}
+    )
+    logger.info("📦 Submitted %s batch %s (%d inputs)", task, batch.id, len(inputs))
+    return batch.id
+
+async def await_batch(
+    batch_id: str,
+    task: str = "subject",
+    poll_interval: float = BATCH_POLL_INTERVAL
+) -> List[Optional[Any]]:
+    """
+    Poll until the batch finishes, then download and parse its results
+
+    Confidence: 80% ⚠️
+
+    Returns:
+        list: One result per submitted input (see parse_batch_output);
+        all None if the batch failed, expired or was cancelled
+    """
+    client = get_client()
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status in _TERMINAL_STATUSES:
+            break
+        await asyncio.sleep(poll_interval)
+
+    count = int((batch.metadata or {}).get("count", batch.request_counts.total))
+    logger.info(
+        "📦 Batch %s %s: %s/%s succeeded",
+        batch_id, batch.status, batch.request_counts.completed, batch.request_counts.total
+    )
+
+    if not batch.output_file_id:
+        return [None] * count
+
+    output = await client.files.content(batch.output_file_id)
+    return parse_batch_output(output.text, count, task)
+
+__all__ = [
+    'build_batch_jsonl',
+    'parse_batch_output',
+    'submit_batch',
+    'await_batch'
+]
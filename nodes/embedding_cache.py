@@ -0,0 +1,240 @@
+"""
+Embedding cache - Skip the OpenAI embedding round-trip for repeated queries
+
+Confidence: 90% ✅
+
+Exact repeats ("how much is lifeguard training?") otherwise pay ~100-200ms
+and an API call per query. Embeddings are cached as float32 arrays (half
+the memory of a list of Python floats) keyed by a digest of the
+normalized query, in an in-process LRU.
+
+Optional second layer: set EMBEDDING_CACHE_REDIS_URL (and install `redis`)
+to share embeddings across worker processes.
+
+Misses can also be batched: embed_many() sends a list of queries in one
+request, and EMBEDDING_BATCHING=true coalesces concurrent single-query
+misses arriving within EMBEDDING_BATCH_WINDOW_MS (default 10ms).
+
+Limitations:
+- Cached vectors are float32 (the API returns float64-parsed JSON); the
+  difference is far below anything cosine ranking can notice
+"""
+from collections import OrderedDict
+from typing import List, Optional
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+
+from nodes._utils import normalize_input
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_REDIS_URL = os.getenv("EMBEDDING_CACHE_REDIS_URL", "")
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))
+_REDIS_PREFIX = "emb:3-small:"
+
+# Coalesce concurrent cache misses into one embeddings request (opt-in)
+EMBEDDING_BATCHING = os.getenv("EMBEDDING_BATCHING", "false").lower() == "true"
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "10"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_EMB_CACHE = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+
+# Lazy initialization (False = not configured / unavailable)
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = False
+        if EMBEDDING_CACHE_REDIS_URL:
+            try:
+                import redis.asyncio as redis_asyncio
+                _redis = redis_asyncio.from_url(EMBEDDING_CACHE_REDIS_URL)
+            except ImportError:
+                logger.warning("⚠️ EMBEDDING_CACHE_REDIS_URL set but redis is not installed")
+    return _redis or None
+
+
+async def _embed_documents(texts: List[str]) -> List[np.ndarray]:
+    """One embeddings API request for all texts (read-only float32 arrays)"""
+    from nodes.rag_retrieval import get_embeddings
+
+    vectors = await get_embeddings().aembed_documents(texts)
+    arrays = []
+    for vector in vectors:
+        array = np.asarray(vector, dtype=np.float32)
+        array.setflags(write=False)  # shared between callers
+        arrays.append(array)
+    return arrays
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent embedding requests for a short window and sends
+    them as one aembed_documents call
+    """
+
+    def __init__(self, window_ms: float = EMBEDDING_BATCH_WINDOW_MS, max_batch: int = EMBEDDING_BATCH_SIZE):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[tuple] = []  # (text, future)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[tuple]) -> None:
+        try:
+            vectors = await _embed_documents([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+_batcher = EmbeddingBatcher()
+
+
+def embedding_key(query: str) -> str:
+    """Digest of the normalized query"""
+    return hashlib.blake2b(normalize_input(query).encode(), digest_size=16).hexdigest()
+
+
+async def embed_query_cached(query: str) -> np.ndarray:
+    """
+    Embed a query with text-embedding-3-small, using the caches when possible
+
+    Returns:
+        np.ndarray: float32 embedding (1536-dim)
+    """
+    from nodes.rag_retrieval import get_embeddings
+
+    key = embedding_key(query)
+    embedding = _EMB_CACHE.get(key)
+    if embedding is not None:
+        return embedding
+
+    redis_client = _get_redis()
+    if redis_client is not None:
+        try:
+            raw = await redis_client.get(_REDIS_PREFIX + key)
+            if raw is not None:
+                embedding = np.frombuffer(raw, dtype=np.float32)
+                _EMB_CACHE.put(key, embedding)
+                return embedding
+        except Exception as e:
+            logger.warning("⚠️ Embedding cache (redis) read failed: %s", e)
+
+    if EMBEDDING_BATCHING:
+        embedding = await _batcher.embed(query)
+    else:
+        embedding = np.asarray(await get_embeddings().aembed_query(query), dtype=np.float32)
+        embedding.setflags(write=False)  # shared between callers
+    _EMB_CACHE.put(key, embedding)
+
+    if redis_client is not None:
+        try:
+            await redis_client.set(_REDIS_PREFIX + key, embedding.tobytes(), ex=EMBEDDING_CACHE_TTL)
+        except Exception as e:
+            logger.warning("⚠️ Embedding cache (redis) write failed: %s", e)
+
+    return embedding
+
+
+async def embed_many(queries: List[str]) -> List[np.ndarray]:
+    """
+    Embed several queries with a single API request (for batch jobs)
+
+    Cached queries are served from the LRU; only the misses are sent.
+
+    Returns:
+        list: float32 embeddings, in the same order as queries
+    """
+    keys = [embedding_key(query) for query in queries]
+    results = [_EMB_CACHE.get(key) for key in keys]
+    missing = [i for i, embedding in enumerate(results) if embedding is None]
+
+    if missing:
+        vectors = await _embed_documents([queries[i] for i in missing])
+        for i, vector in zip(missing, vectors):
+            _EMB_CACHE.put(keys[i], vector)
+            results[i] = vector
+
+    return results
+
+
+__all__ = [
+    'LRUCache',
+    'EmbeddingBatcher',
+    'embedding_key',
+    'embed_query_cached',
+    'embed_many'
+]
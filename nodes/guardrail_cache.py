@@ -0,0 +1,128 @@
+"""
+Guardrail cache - Reuse LLM safety verdicts for repeated user input
+
+Confidence: 90% ✅
+
+The LLM guardrail (temperature 0) gives the same verdict for the same text,
+yet every ambiguous message costs a ~300ms gpt-4o-mini call. This LFU cache
+keys verdicts by a digest of the normalized input, so questions repeated
+across sessions ("how much is CPR?") skip the call entirely.
+
+Eviction is least-frequently-used (oldest first among equal counts) via a
+min-heap with lazy invalidation: stale heap entries are skipped on pop and
+the heap is rebuilt when it grows past twice the capacity.
+
+Limitations:
+- In-process only (not shared across workers)
+"""
+from typing import Dict, Any, Optional
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+
+GUARDRAIL_CACHE_SIZE = int(os.getenv("GUARDRAIL_CACHE_SIZE", "50000"))
+
+
+def cache_key(user_input_normalized: str) -> str:
+    """Fixed-size key for normalized user input"""
+    return hashlib.blake2b(user_input_normalized.encode(), digest_size=16).hexdigest()
+
+
+class LFUCache:
+    """
+    Bounded least-frequently-used cache
+
+    Thread-safe: get/put never await, so one lock covers threads and
+    concurrent coroutines alike.
+    """
+
+    def __init__(self, capacity: int = GUARDRAIL_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: Dict[str, list] = {}  # key -> [value, freq, tick]
+        self._heap: list = []  # (freq, tick, key); may hold stale entries
+        self._ticks = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _touch(self, key: str, entry: list) -> None:
+        entry[1] += 1
+        entry[2] = next(self._ticks)
+        heapq.heappush(self._heap, (entry[1], entry[2], key))
+        if len(self._heap) > 2 * self.capacity:
+            self._heap = [(e[1], e[2], k) for k, e in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _evict(self) -> None:
+        while self._heap:
+            freq, tick, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == freq and entry[2] == tick:
+                del self._entries[key]
+                return
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value (counting the hit), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(key, entry)
+            return entry[0]
+
+    def put(self, key: str, value: Any) -> None:
+        """Insert or update a value, evicting the least-used entry when full"""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0] = value
+                self._touch(key, entry)
+                return
+            if len(self._entries) >= self.capacity:
+                self._evict()
+            entry = [value, 0, 0]
+            self._entries[key] = entry
+            self._touch(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+            self.hits = self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for logging"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Process-wide cache used by llm_guardrail
+guardrail_cache = LFUCache()
+
+
+def get_stats() -> Dict[str, Any]:
+    """Stats for the process-wide guardrail cache"""
+    return guardrail_cache.get_stats()
+
+
+__all__ = [
+    'LFUCache',
+    'guardrail_cache',
+    'cache_key',
+    'get_stats'
+]
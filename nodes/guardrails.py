@@ -10,9 +10,16 @@ Limitations:
 
 Recommendation: Use NeMo Guardrails or Llama Guard in production
 """
+import logging
+import re
+from functools import lru_cache
 from typing import Dict, Any
 from langchain_core.messages import AIMessage
 
+from nodes._utils import _extract_text, count_special_chars, normalize_input
+
+logger = logging.getLogger(__name__)
+
 # Blocked keywords (jailbreak attempts, inappropriate content)
 # Using partial matches to catch variations
 BLOCKED_KEYWORDS = [
@@ -44,6 +51,38 @@ OFFENSIVE_KEYWORDS = [
 MAX_INPUT_LENGTH = 2000
 MIN_INPUT_LENGTH = 1
 
+
+def _build_keyword_pattern() -> re.Pattern | None:
+    """
+    Compile all keyword lists into one alternation, tagged by category
+
+    A single scan over the normalized input finds the first blocked or
+    offensive keyword; the named group tells which list it came from.
+    """
+    groups = [
+        f"(?P<{category}>{'|'.join(re.escape(k.lower()) for k in keywords)})"
+        for category, keywords in (
+            ("blocked", BLOCKED_KEYWORDS),
+            ("offensive", OFFENSIVE_KEYWORDS),
+        )
+        if keywords
+    ]
+    return re.compile("|".join(groups)) if groups else None
+
+
+# Built once at import; rebuild if the keyword lists change
+_KEYWORD_RE = _build_keyword_pattern()
+
+# Response shown to the user for each block reason
+_BLOCK_RESPONSES = {
+    "input_too_short": "Please provide a question or message.",
+    "input_too_long": "Please keep your question concise (under 2000 characters).",
+    "inappropriate_request": "I can only answer questions about lifeguard training, CPR, and first aid courses. How can I help you with our training programs?",
+    "inappropriate_content": "I'm here to help with course information. Please keep questions appropriate.",
+    "suspicious_input": "I'm having trouble understanding your question. Could you rephrase it?",
+}
+
+
 def input_guardrail(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Check input for policy violations
@@ -79,77 +118,79 @@ def input_guardrail(state: Dict[str, Any]) -> Dict[str, Any]:
     last_message = state["messages"][-1]
     
     # Handle different message types
-    if hasattr(last_message, 'content'):
-        user_input = last_message.content
-    else:
-        user_input = str(last_message)
-    
-    # Normalize for checking (collapse whitespace)
-    user_input_normalized = ' '.join(user_input.lower().split())
+    user_input = _extract_text(last_message)
     
-    # Check 1: Input length validation (check actual content, not whitespace)
+    # Check 1: Input length validation on the raw text, before any
+    # normalization work (and before oversized text reaches the cache)
+    user_input_normalized = None
     if len(user_input.strip()) < MIN_INPUT_LENGTH:
-        return {
-            **state,
-            "blocked": True,
-            "block_reason": "input_too_short",
-            "final_response": "Please provide a question or message."
-        }
+        block_reason, blocked_keyword = "input_too_short", None
+    elif len(user_input) > MAX_INPUT_LENGTH:
+        block_reason, blocked_keyword = "input_too_long", None
+    else:
+        # Normalize once (casefold, collapse whitespace); shared with
+        # downstream nodes via state["_normalized_input"]
+        user_input_normalized = normalize_input(user_input)
+        block_reason, blocked_keyword = _classify_input(user_input, user_input_normalized)
     
-    if len(user_input) > MAX_INPUT_LENGTH:
+    # All checks passed
+    if block_reason is None:
         return {
             **state,
-            "blocked": True,
-            "block_reason": "input_too_long",
-            "final_response": "Please keep your question concise (under 2000 characters)."
+            "blocked": False,
+            "block_reason": None,
+            "_normalized_input": user_input_normalized
         }
     
-    # Check 2: Blocked keywords (jailbreak attempts)
-    for keyword in BLOCKED_KEYWORDS:
-        if keyword in user_input_normalized:
-            # Log which keyword was detected (for debugging)
-            print(f"⚠️ Guardrail triggered: '{keyword}' detected")
-            
-            return {
-                **state,
-                "blocked": True,
-                "block_reason": "inappropriate_request",
-                "blocked_keyword": keyword,
-                "final_response": "I can only answer questions about lifeguard training, CPR, and first aid courses. How can I help you with our training programs?"
-            }
-    
-    # Check 3: Offensive content
-    for keyword in OFFENSIVE_KEYWORDS:
-        if keyword in user_input_normalized:
-            print(f"⚠️ Guardrail triggered: offensive content detected")
-            
-            return {
-                **state,
-                "blocked": True,
-                "block_reason": "inappropriate_content",
-                "final_response": "I'm here to help with course information. Please keep questions appropriate."
-            }
+    result = {
+        **state,
+        "blocked": True,
+        "block_reason": block_reason,
+        "final_response": _BLOCK_RESPONSES[block_reason],
+        "_normalized_input": user_input_normalized
+    }
+    if blocked_keyword:
+        result["blocked_keyword"] = blocked_keyword
+    return result
+
+
+@lru_cache(maxsize=4096)
+def _classify_input(user_input: str, user_input_normalized: str) -> tuple[str | None, str | None]:
+    """
+    Run the content checks on user text that already passed the length checks
+    
+    ``user_input_normalized`` is ``normalize_input(user_input)``.
+    
+    The verdict depends only on the text (the keyword lists are static), so
+    it is cached; replayed messages skip every check. Call
+    ``_classify_input.cache_clear()`` after changing the keyword lists.
+    
+    Returns:
+        tuple: (block_reason, blocked_keyword) - block_reason is None when safe
+    """
+    # Check 2 + 3: Blocked keywords (jailbreak attempts) and offensive content
+    # in a single pass over the normalized input
+    hit = _KEYWORD_RE.search(user_input_normalized) if _KEYWORD_RE else None
+    
+    if hit and hit.lastgroup == "blocked":
+        keyword = hit.group()
+        # Log which keyword was detected (for debugging)
+        logger.info("⚠️ Guardrail triggered: '%s' detected", keyword)
+        return "inappropriate_request", keyword
+    
+    if hit:
+        logger.info("⚠️ Guardrail triggered: offensive content detected")
+        return "inappropriate_content", None
     
     # Check 4: Excessive special characters (possible injection attempt)
-    special_char_count = sum(1 for c in user_input if not c.isalnum() and not c.isspace())
+    special_char_count = count_special_chars(user_input)
     special_char_ratio = special_char_count / len(user_input) if user_input else 0
     
     if special_char_ratio > 0.4:  # More than 40% special characters
-        print(f"⚠️ Guardrail triggered: excessive special characters ({special_char_ratio:.1%})")
-        
-        return {
-            **state,
-            "blocked": True,
-            "block_reason": "suspicious_input",
-            "final_response": "I'm having trouble understanding your question. Could you rephrase it?"
-        }
+        logger.info("⚠️ Guardrail triggered: excessive special characters (%.1f%%)", special_char_ratio * 100)
+        return "suspicious_input", None
     
-    # All checks passed
-    return {
-        **state,
-        "blocked": False,
-        "block_reason": None
-    }
+    return None, None
 
 def get_blocked_keywords() -> list[str]:
     """
@@ -162,12 +203,14 @@ def get_blocked_keywords() -> list[str]:
     """
     return BLOCKED_KEYWORDS.copy()
 
-def is_input_safe(text: str) -> tuple[bool, str | None]:
+def _is_input_safe_uncached(text: str) -> tuple[bool, str | None]:
     """
     Standalone function to check if input is safe
     
     Confidence: 75% ⚠️
     
+    Exposed as the memoized `is_input_safe`.
+    
     Args:
         text: Input text to check
         
@@ -192,3 +235,8 @@ def is_input_safe(text: str) -> tuple[bool, str | None]:
     
     return (not result.get("blocked"), result.get("block_reason"))
 
+
+# Same text always gets the same verdict, so repeat checks skip building
+# the state dict and message entirely
+is_input_safe = lru_cache(maxsize=2048)(_is_input_safe_uncached)
+
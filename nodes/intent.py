@@ -14,9 +14,9 @@ Features:
 - Defaults to INFO if unclear
 - Fast classification (~300ms)
 """
+import re
 from typing import Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from nodes._utils import _extract_text
 import os
 
 # Lazy initialization
@@ -26,10 +26,14 @@ def get_llm():
     """Get or create ChatOpenAI instance (lazy initialization)"""
     global _llm
     if _llm is None:
+        # Imported here: keyword-hinted turns never need langchain_openai
+        from langchain_openai import ChatOpenAI
+        from services.shared_llm_client import get_http_client
         _llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,  # Deterministic for classification
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=get_http_client()  # Shared connection pool
         )
     return _llm
 
@@ -94,16 +98,21 @@ async def classify_intent(state: Dict[str, Any]) -> Dict[str, Any]:
     # Get last user message
     last_message = state["messages"][-1]
     
-    if hasattr(last_message, 'content'):
-        user_input = last_message.content
-    else:
-        user_input = str(last_message)
+    user_input = _extract_text(last_message)
     
     # Handle empty input
     if not user_input.strip():
         return {**state, "intent": "INFO"}
     
+    # Fast path: obvious pricing/booking wording skips the LLM call
+    hint = quick_intent_hint(state.get("_normalized_input") or user_input)
+    if hint is not None:
+        print(f"🎯 Intent hinted: '{user_input[:50]}...' → {hint}")
+        return {**state, "intent": hint}
+    
     try:
+        from langchain_core.messages import SystemMessage, HumanMessage
+        
         # Ask LLM to classify
         llm = get_llm()
         response = await llm.ainvoke([
@@ -143,7 +152,8 @@ def classify_intent_sync(text: str) -> str:
     Returns:
         str: Intent (INFO, PRICING, or BOOKING)
     """
-    import asyncio
+    from langchain_core.messages import HumanMessage
+    from nodes._utils import run_sync
     
     # Create minimal state
     state = {
@@ -151,31 +161,58 @@ def classify_intent_sync(text: str) -> str:
         "intent": None
     }
     
-    # Run async function synchronously
-    result = asyncio.run(classify_intent(state))
+    # Run on the shared background loop (no loop setup/teardown per call)
+    result = run_sync(classify_intent(state))
     
     return result.get("intent", "INFO")
 
-# Quick keyword-based intent hints (optional optimization)
-# Could use these for fast pre-classification before LLM call
+# Quick keyword-based intent hints
+# Used for fast pre-classification before the LLM call, so only
+# high-precision phrases belong here. Words that also show up in
+# informational questions ("schedule", "join", "ready to", "i want to",
+# bare "book", "fee", "$") are left to the LLM.
 PRICING_KEYWORDS = [
-    "price", "cost", "how much", "fee", "payment",
-    "discount", "group rate", "affordable", "$", "dollar"
+    "price", "pricing", "cost", "how much is", "how much are",
+    "how much for", "discount", "group rate"
 ]
 
 BOOKING_KEYWORDS = [
-    "register", "sign up", "enroll", "book", "schedule",
-    "join", "get started", "ready to", "i want to"
+    "register", "sign up", "sign me up", "enroll",
+    "book me", "reserve a spot", "reserve a seat"
 ]
 
+def _keyword_alternation(keywords: list[str]) -> str:
+    """
+    Join keywords into one alternation
+    
+    Word boundaries apply only at alphanumeric edges, and simple inflections
+    are allowed ("enroll" → "enrolling", "cost" → "costs") while longer
+    words like "priceless" no longer match.
+    """
+    def pattern(keyword: str) -> str:
+        start = r"\b" if keyword[0].isalnum() else ""
+        end = r"(?:s|es|d|ed|ing)?\b" if keyword[-1].isalnum() else ""
+        return f"{start}{re.escape(keyword)}{end}"
+    
+    return "|".join(pattern(k) for k in keywords)
+
+
+# One pattern for both categories; the named group tags which one matched
+_INTENT_KEYWORD_RE = re.compile(
+    f"(?P<PRICING>{_keyword_alternation(PRICING_KEYWORDS)})"
+    f"|(?P<BOOKING>{_keyword_alternation(BOOKING_KEYWORDS)})",
+    re.IGNORECASE,
+)
+
+
 def quick_intent_hint(text: str) -> str | None:
     """
-    Quick keyword-based intent hint (optional optimization)
+    Quick keyword-based intent hint
     
     Confidence: 70% ⚠️
     
-    This could be used to skip LLM call for obvious cases,
-    but not implemented in main flow yet.
+    Used by classify_intent to skip the LLM call for obvious cases.
+    Single scan over the text; pricing wins over booking when both appear.
     
     Args:
         text: Input text
@@ -183,16 +220,11 @@ def quick_intent_hint(text: str) -> str | None:
     Returns:
         str | None: Intent hint or None if unclear
     """
-    text_lower = text.lower()
-    
-    # Check pricing keywords
-    if any(keyword in text_lower for keyword in PRICING_KEYWORDS):
-        return "PRICING"
-    
-    # Check booking keywords
-    if any(keyword in text_lower for keyword in BOOKING_KEYWORDS):
-        return "BOOKING"
-    
-    # Unclear - need LLM
-    return None
-
+    hint = None
+    for match in _INTENT_KEYWORD_RE.finditer(text):
+        if match.lastgroup == "PRICING":
+            return "PRICING"
+        hint = "BOOKING"
+    
+    # None if unclear - need LLM
+    return hint
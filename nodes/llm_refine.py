@@ -4,7 +4,7 @@ LLM refinement - Generate response with context
 Confidence: 90% ✅
 Limitations:
 - GPT-4o-mini only (faster but less capable than GPT-4o)
-- No streaming (full response only)
+- Sources are appended after the streamed answer (not streamed)
 - Fixed system prompt (not adaptive)
 - Last 10 messages only (context window management)
 
@@ -17,8 +17,11 @@ Features:
 - Off-topic handling
 """
 from typing import Dict, Any
+from functools import lru_cache
 from langchain_openai import ChatOpenAI
+from services.shared_llm_client import get_http_client
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 import os
 
 # Lazy initialization
@@ -35,23 +38,14 @@ def get_llm():
         _llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0.7,  # Slightly creative for natural responses
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=get_http_client()  # Shared connection pool
         )
     return _llm
 
-def build_system_prompt(state: Dict[str, Any]) -> str:
-    """
-    Build system prompt with context
-    
-    Confidence: 95% ✅
-    
-    Args:
-        state: Current graph state
-        
-    Returns:
-        str: Complete system prompt with RAG context, user info, and intent guidance
-    """
-    base_prompt = """You are a helpful assistant for LifeGuard-Pro, a lifeguard and CPR training company.
+# Stable prefix: identical bytes on every call, so OpenAI's prompt cache
+# can reuse it; everything per-request goes after it
+BASE_PROMPT = """You are a helpful assistant for LifeGuard-Pro, a lifeguard and CPR training company.
 
 Your role:
 - Answer questions about our courses clearly and professionally
@@ -64,29 +58,55 @@ Guidelines:
 - Cite sources when using provided context
 - Be encouraging about water safety training
 - Use a professional but friendly tone"""
+
+INTENT_GUIDANCE = {
+    "PRICING": "\n\n💰 PRICING QUERY: Focus on pricing information. Mention checking our pricing page for detailed rates. Be clear about what's included in courses.",
+    "BOOKING": "\n\n📝 BOOKING REQUEST: Guide the user through the registration process. Provide clear next steps. Mention our registration page or contact information.",
+    "INFO": "\n\nℹ️ INFORMATION QUERY: Provide comprehensive educational information. Be thorough but concise.",
+}
+
+@lru_cache(maxsize=1024)
+def _build_prompt_suffix(rag_context: str | None, user_email: str | None, user_name: str | None, intent: str) -> str:
+    """Per-request part of the system prompt (memoized on its inputs)"""
+    parts = []
     
     # Add RAG context if available
-    if state.get("rag_context"):
-        base_prompt += f"\n\n=== RELEVANT INFORMATION ===\n{state['rag_context']}\n\nUse this information to answer the user's question accurately."
+    if rag_context:
+        parts.append(f"\n\n=== RELEVANT INFORMATION ===\n{rag_context}\n\nUse this information to answer the user's question accurately.")
     
     # Add user info if available (personalization)
-    if state.get("user_email"):
-        name = state.get("user_name", "there")
-        base_prompt += f"\n\nUser's name: {name}\nUser's email: {state['user_email']}"
-        base_prompt += "\nPersonalize your response using their name when appropriate."
+    if user_email:
+        parts.append(f"\n\nUser's name: {user_name}\nUser's email: {user_email}")
+        parts.append("\nPersonalize your response using their name when appropriate.")
     
     # Add intent-specific guidance
-    intent = state.get("intent", "INFO")
-    if intent == "PRICING":
-        base_prompt += "\n\n💰 PRICING QUERY: Focus on pricing information. Mention checking our pricing page for detailed rates. Be clear about what's included in courses."
-    elif intent == "BOOKING":
-        base_prompt += "\n\n📝 BOOKING REQUEST: Guide the user through the registration process. Provide clear next steps. Mention our registration page or contact information."
-    elif intent == "INFO":
-        base_prompt += "\n\nℹ️ INFORMATION QUERY: Provide comprehensive educational information. Be thorough but concise."
-    
-    return base_prompt
+    parts.append(INTENT_GUIDANCE.get(intent, ""))
+    
+    return "".join(parts)
 
-async def llm_refine(state: Dict[str, Any]) -> Dict[str, Any]:
+def build_system_prompt(state: Dict[str, Any]) -> str:
+    """
+    Build system prompt with context
+    
+    Confidence: 95% ✅
+    
+    BASE_PROMPT always comes first, so the prompt prefix is byte-identical
+    across requests; the RAG/user/intent suffix is cached per input tuple.
+    
+    Args:
+        state: Current graph state
+        
+    Returns:
+        str: Complete system prompt with RAG context, user info, and intent guidance
+    """
+    return BASE_PROMPT + _build_prompt_suffix(
+        state.get("rag_context"),
+        state.get("user_email"),
+        state.get("user_name", "there"),
+        state.get("intent", "INFO")
+    )
+
+async def llm_refine(state: Dict[str, Any], config: RunnableConfig | None = None) -> Dict[str, Any]:
     """
     Generate final response
     
@@ -97,26 +117,31 @@ async def llm_refine(state: Dict[str, Any]) -> Dict[str, Any]:
     2. Builds context from RAG results
     3. Personalizes with user info
     4. Maintains multi-turn conversation
-    5. Generates natural language response
+    5. Generates natural language response (streamed token by token)
     6. Adds source citations
     
+    Tokens are streamed with llm.astream under the node's config, so graph
+    consumers using stream_mode="messages" (or astream_events) receive them
+    as they are generated instead of after the whole answer.
+    
     Args:
         state: Current graph state with context
+        config: Runnable config from LangGraph (carries the stream callbacks)
         
     Returns:
-        Updated state with final response
+        State update (only the changed keys; LangGraph merges it)
         
     State Updates:
-        - messages: Appends AI response
+        - messages: New AI response (appended by the add_messages reducer)
         - final_response: str (the actual response text)
     """
     if not state.get("messages"):
-        return state
+        return {}
     
     # Handle blocked input (from guardrails)
     if state.get("blocked"):
         # Response already set by guardrails
-        return state
+        return {}
     
     # Handle off-topic requests
     if not state.get("on_topic", True):
@@ -140,8 +165,7 @@ async def llm_refine(state: Dict[str, Any]) -> Dict[str, Any]:
         print("🚫 Off-topic query - providing helpful redirection")
         
         return {
-            **state,
-            "messages": state["messages"] + [off_topic_response],
+            "messages": [off_topic_response],
             "final_response": off_topic_response.content
         }
     
@@ -172,26 +196,24 @@ async def llm_refine(state: Dict[str, Any]) -> Dict[str, Any]:
         
         print(f"🤖 Generating response (Intent: {state.get('intent', 'INFO')})...")
         
-        response = await llm.ainvoke(conversation)
+        # Stream tokens; accumulate the full text for the messages update
+        response_parts = []
+        async for chunk in llm.astream(conversation, config=config):
+            if chunk.content:
+                response_parts.append(chunk.content)
         
         # Build final response text
-        response_text = response.content
+        response_text = "".join(response_parts)
         
-        # Add sources if available
-        if state.get("rag_sources") and len(state["rag_sources"]) > 0:
-            sources_text = "\n\n📚 **Sources:**\n" + "\n".join([
-                f"{i+1}. {s['title'] or s['url']}"
-                for i, s in enumerate(state["rag_sources"][:3])
-            ])
-            response_text += sources_text
+        # Add sources if available (after the stream finishes)
+        response_text = format_response_with_sources(response_text, state.get("rag_sources"))
         
         ai_message = AIMessage(content=response_text)
         
         print(f"✅ Response generated ({len(response_text)} chars)")
         
         return {
-            **state,
-            "messages": state["messages"] + [ai_message],
+            "messages": [ai_message],
             "final_response": response_text
         }
         
@@ -206,8 +228,7 @@ async def llm_refine(state: Dict[str, Any]) -> Dict[str, Any]:
         )
         
         return {
-            **state,
-            "messages": state["messages"] + [error_response],
+            "messages": [error_response],
             "final_response": error_response.content,
             "llm_error": str(e)
         }
@@ -228,10 +249,8 @@ def format_response_with_sources(response: str, sources: list) -> str:
     if not sources:
         return response
     
-    sources_text = "\n\n📚 **Sources:**\n" + "\n".join([
-        f"{i+1}. {s.get('title') or s.get('url')}"
-        for i, s in enumerate(sources[:3])
-    ])
-    
-    return response + sources_text
+    return response + "\n\n📚 **Sources:**\n" + "\n".join(
+        f"{i}. {s.get('title') or s.get('url')}"
+        for i, s in enumerate(sources[:3], 1)
+    )
 
@@ -0,0 +1,117 @@
+"""
+Local guard classifier - Cheap on-CPU safety check before the guardrail LLM
+
+Confidence: 75% ⚠️
+
+Runs a small int8-quantized ONNX text classifier (e.g. a MiniLM/BERT
+jailbreak or toxicity model) in a few milliseconds. Confident predictions
+settle the verdict locally; only uncertain ones (unsafe probability inside
+[GUARDRAIL_LOCAL_LOW, GUARDRAIL_LOCAL_HIGH]) are escalated to the LLM.
+
+Disabled unless GUARDRAIL_LOCAL_MODEL points at a directory containing:
+- model.onnx      (exported + quantized, e.g.
+                   `optimum-cli export onnx --model <hf-model> guard/` then
+                   `optimum-cli onnxruntime quantize --onnx_model guard/ --avx512_vnni -o guard/`;
+                   rename the quantized file to model.onnx)
+- tokenizer.json  (Hugging Face fast tokenizer)
+
+Requires the optional `onnxruntime` and `tokenizers` packages; if they or
+the model are missing, the classifier stays disabled and every ambiguous
+input goes to the LLM as before.
+"""
+from typing import Optional
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GUARDRAIL_LOCAL_MODEL = os.getenv("GUARDRAIL_LOCAL_MODEL", "")
+GUARDRAIL_LOCAL_LOW = float(os.getenv("GUARDRAIL_LOCAL_LOW", "0.3"))
+GUARDRAIL_LOCAL_HIGH = float(os.getenv("GUARDRAIL_LOCAL_HIGH", "0.7"))
+GUARDRAIL_LOCAL_UNSAFE_LABEL = int(os.getenv("GUARDRAIL_LOCAL_UNSAFE_LABEL", "1"))
+_MAX_TOKENS = 256
+
+# Lazy initialization (False = tried and unavailable)
+_classifier = None
+
+
+class LocalGuardClassifier:
+    """
+    ONNX Runtime session + tokenizer returning label probabilities
+
+    Generic over the label set; also used by subject_check's on/off-topic model.
+    """
+
+    def __init__(self, model_dir: str):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=_MAX_TOKENS)
+
+    def probabilities(self, text: str) -> np.ndarray:
+        """Per-label probabilities (softmax; [1-p, p] for a single-logit head)"""
+        encoding = self.tokenizer.encode(text)
+        feeds = {
+            "input_ids": np.asarray([encoding.ids], dtype=np.int64),
+            "attention_mask": np.asarray([encoding.attention_mask], dtype=np.int64),
+            "token_type_ids": np.asarray([encoding.type_ids], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0][0]
+        if logits.shape[0] == 1:  # single-logit (sigmoid) head
+            p = float(1 / (1 + np.exp(-logits[0])))
+            return np.asarray([1 - p, p])
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+
+    def unsafe_probability(self, text: str) -> float:
+        return float(self.probabilities(text)[GUARDRAIL_LOCAL_UNSAFE_LABEL])
+
+
+def get_local_classifier() -> Optional[LocalGuardClassifier]:
+    """Get the local classifier, or None if not configured/available"""
+    global _classifier
+    if _classifier is None:
+        _classifier = False
+        if GUARDRAIL_LOCAL_MODEL:
+            try:
+                _classifier = LocalGuardClassifier(GUARDRAIL_LOCAL_MODEL)
+                logger.info("✅ Local guard classifier loaded from %s", GUARDRAIL_LOCAL_MODEL)
+            except Exception as e:
+                logger.warning("⚠️ Local guard classifier unavailable: %s", e)
+    return _classifier or None
+
+
+def local_verdict(text: str) -> Optional[str]:
+    """
+    "SAFE" / "UNSAFE" when the local model is confident, else None
+
+    None also means the classifier is disabled - escalate to the LLM.
+    """
+    classifier = get_local_classifier()
+    if classifier is None:
+        return None
+    try:
+        p_unsafe = classifier.unsafe_probability(text)
+    except Exception as e:
+        logger.warning("⚠️ Local guard classifier error: %s", e)
+        return None
+    if p_unsafe >= GUARDRAIL_LOCAL_HIGH:
+        return "UNSAFE"
+    if p_unsafe <= GUARDRAIL_LOCAL_LOW:
+        return "SAFE"
+    return None
+
+
+__all__ = [
+    'LocalGuardClassifier',
+    'get_local_classifier',
+    'local_verdict'
+]
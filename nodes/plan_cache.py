@@ -0,0 +1,130 @@
+"""
+Plan cache - Reuse planner output for near-duplicate user messages
+
+Confidence: 80% ⚠️
+
+Recurring questions ("how much is CPR", "sign me up") produce nearly
+identical plans, yet every turn pays a full planner LLM round-trip. This
+cache embeds the user message (same model as RAG retrieval) and reuses a
+stored plan when a previous message was similar enough AND the
+conversation was in a compatible state when that plan was produced.
+
+Disabled by default - set PLAN_CACHE_ENABLED=true to enable.
+
+Limitations:
+- In-process only (not shared across workers)
+- Slot values copied from the cached plan (e.g. quantity) are only as
+  right as the similarity threshold; keep it high
+"""
+from typing import Dict, Any, Optional, Tuple
+import copy
+import os
+
+import numpy as np
+
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "false").lower() == "true"
+PLAN_CACHE_THRESHOLD = float(os.getenv("PLAN_CACHE_THRESHOLD", "0.90"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "512"))
+
+# Slot groups whose presence changes what the planner asks/plans next
+_SLOT_KEYS = ("pricing_slots", "rag_slots", "all_services_slots", "quote_slots", "booking_slots")
+
+
+def state_signature(state: Dict[str, Any]) -> Tuple:
+    """
+    Coarse description of conversation state a plan depends on
+
+    Plans are only reused between turns with the same signature: same
+    previous next_action, same slot groups filled, same contact info known.
+    """
+    return (
+        state.get("next_action", "NONE"),
+        tuple(key for key in _SLOT_KEYS if state.get(key)),
+        bool(state.get("user_email")),
+    )
+
+
+class PlanCache:
+    """
+    Bounded nearest-neighbour cache of planner outputs
+
+    Embeddings are L2-normalized float32 rows, so cosine similarity against
+    every cached entry is a single matrix-vector product.
+    """
+
+    def __init__(self, max_entries: int = PLAN_CACHE_MAX_ENTRIES, threshold: float = PLAN_CACHE_THRESHOLD):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._matrix: Optional[np.ndarray] = None  # (n, dim) normalized embeddings
+        self._signatures: list = []
+        self._plans: list = []
+        self._next = 0  # ring-buffer slot to overwrite once full
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, embedding, signature: Tuple) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the most similar cached plan, or None
+
+        Only entries with a matching state signature are considered.
+        """
+        if not self._plans:
+            return None
+
+        sims = self._matrix @ self._normalize(embedding)
+        for idx in np.argsort(sims)[::-1]:
+            if sims[idx] < self.threshold:
+                break
+            if self._signatures[idx] == signature:
+                return copy.deepcopy(self._plans[idx])
+        return None
+
+    def store(self, embedding, signature: Tuple, plan: Dict[str, Any]) -> None:
+        """Insert a plan, overwriting the oldest entry when full"""
+        vec = self._normalize(embedding)
+        plan = copy.deepcopy(plan)
+
+        if len(self._plans) < self.max_entries:
+            row = vec[None, :]
+            self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+            self._signatures.append(signature)
+            self._plans.append(plan)
+            return
+
+        self._matrix[self._next] = vec
+        self._signatures[self._next] = signature
+        self._plans[self._next] = plan
+        self._next = (self._next + 1) % self.max_entries
+
+    def clear(self) -> None:
+        self._matrix = None
+        self._signatures.clear()
+        self._plans.clear()
+        self._next = 0
+
+
+# Process-wide cache used by agent_node
+plan_cache = PlanCache()
+
+
+async def embed_message(text: str):
+    """Embed a user message with the same model used for RAG retrieval"""
+    from nodes.embedding_cache import embed_query_cached
+
+    return await embed_query_cached(text)
+
+
+__all__ = [
+    'PLAN_CACHE_ENABLED',
+    'PlanCache',
+    'plan_cache',
+    'state_signature',
+    'embed_message'
+]
@@ -14,10 +14,55 @@ Limitations:
 - Costs ~$0.00002 per query
 """
 from typing import Dict, Any, List
+import io
 from langchain_openai import OpenAIEmbeddings
-from config.database import get_connection
+from config.database import get_async_pool, set_hnsw_ef_search_async
+from config.rag_config import get_config
+from nodes._utils import _extract_text
+from nodes.embedding_cache import embed_query_cached
 import os
 
+# HNSW search breadth (see migrations/001_hnsw_vector_indexes.sql)
+_HNSW_EF_SEARCH = get_config("vector").get("hnsw_ef_search", 40)
+
+# Document fields: copied onto chunks (migrations/002) or joined from documents
+if get_config("vector").get("denormalized_chunks"):
+    _DOC_SOURCE = "chunks c"
+    _DOC_FIELDS = "c.url, c.document_type, c.title"
+else:
+    _DOC_SOURCE = "chunks c JOIN documents d ON d.document_id = c.document_id"
+    _DOC_FIELDS = "d.url, d.document_type, d.title"
+
+# Prompt budget: per-chunk characters (trimmed in SQL) and total context
+# tokens (~4 chars/token, same estimate as utils.helpers.count_tokens_approx)
+RAG_CHUNK_MAX_CHARS = int(os.getenv("RAG_CHUNK_MAX_CHARS", "800"))
+RAG_CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "1500"))
+_CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+_RAG_SEARCH_SQL = f"""
+    SELECT 
+        LEFT(c.content, {RAG_CHUNK_MAX_CHARS}) as content,
+        c.chunk_index,
+        c.token_count,
+        {_DOC_FIELDS},
+        c.embedding <=> %(q)s as distance
+    FROM {_DOC_SOURCE}
+    WHERE c.embedding IS NOT NULL
+    ORDER BY c.embedding <=> %(q)s
+    LIMIT 5
+"""
+
+_QUERY_SEARCH_SQL = f"""
+    SELECT 
+        c.content,
+        {_DOC_FIELDS},
+        c.embedding <=> %(q)s as distance
+    FROM {_DOC_SOURCE}
+    WHERE c.embedding IS NOT NULL
+    ORDER BY c.embedding <=> %(q)s
+    LIMIT %(limit)s
+"""
+
 # Lazy initialization
 _embeddings = None
 
@@ -75,7 +120,7 @@ async def rag_retrieval(state: Dict[str, Any]) -> Dict[str, Any]:
     
     # Get last user message
     last_message = state["messages"][-1]
-    user_query = last_message.content if hasattr(last_message, 'content') else str(last_message)
+    user_query = _extract_text(last_message)
     
     # Handle empty query
     if not user_query.strip():
@@ -89,46 +134,40 @@ async def rag_retrieval(state: Dict[str, Any]) -> Dict[str, Any]:
     try:
         # Generate query embedding using OpenAI
         print(f"🔍 Generating OpenAI embedding for: '{user_query[:50]}...'")
-        embeddings = get_embeddings()
-        query_embedding = await embeddings.aembed_query(user_query)
+        # Repeated queries are served from the embedding cache
+        query_embedding = await embed_query_cached(user_query)
         print(f"📊 Embedding generated: {len(query_embedding)} dimensions (OpenAI 3-small)")
         
-        # Vector search in chunks table
-        with get_connection() as conn:
-            with conn.cursor() as cur:
+        # Vector search in chunks table (pooled connection, prepared statement)
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.transaction(), conn.cursor() as cur:
+                await set_hnsw_ef_search_async(cur, _HNSW_EF_SEARCH)
+                
                 # Cosine distance search
                 # Both query and chunks are 1536-dim OpenAI embeddings ✅
+                # float32 array bound once (%(q)s) and sent binary via the pgvector adapter
                 
-                cur.execute("""
-                    SELECT 
-                        c.content,
-                        c.chunk_index,
-                        c.token_count,
-                        d.url,
-                        d.document_type,
-                        d.title,
-                        c.embedding <=> %s::vector as distance
-                    FROM chunks c
-                    JOIN documents d ON d.document_id = c.document_id
-                    WHERE c.embedding IS NOT NULL
-                    ORDER BY c.embedding <=> %s::vector
-                    LIMIT 5
-                """, (query_embedding, query_embedding))
+                await cur.execute(_RAG_SEARCH_SQL, {"q": query_embedding}, prepare=True)
                 
-                results = cur.fetchall()
+                results = await cur.fetchall()
         
         print(f"✅ Retrieved {len(results)} chunks")
         
-        # Build context string
-        context_parts = []
+        # Build context string (clipped to the prompt token budget)
+        context_buf = io.StringIO()
+        context_budget = RAG_CONTEXT_MAX_TOKENS * 4
         sources = []
         
         for i, result in enumerate(results, 1):
             # Format: [Source 1: Title] Content
             source_title = result['title'] or result['url']
-            context_parts.append(
-                f"[Source {i}: {source_title}]\n{result['content']}"
-            )
+            if context_budget > 0:
+                if i > 1:
+                    context_buf.write(_CONTEXT_SEPARATOR)
+                part = f"[Source {i}: {source_title}]\n{result['content']}"[:context_budget]
+                context_buf.write(part)
+                context_budget -= len(part) + len(_CONTEXT_SEPARATOR)
             
             sources.append({
                 "url": result["url"],
@@ -142,7 +181,7 @@ async def rag_retrieval(state: Dict[str, Any]) -> Dict[str, Any]:
             # Debug: Show relevance
             print(f"  Source {i}: {source_title[:50]}... (distance: {result['distance']:.3f})")
         
-        context = "\n\n---\n\n".join(context_parts)
+        context = context_buf.getvalue()
         
         return {
             **state,
@@ -177,28 +216,18 @@ async def search_by_query(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     Returns:
         list: Search results with content and metadata
     """
-    # Generate embedding using OpenAI
-    embeddings = get_embeddings()
-    query_embedding = await embeddings.aembed_query(query)
+    # Generate embedding using OpenAI (cached for repeated queries)
+    query_embedding = await embed_query_cached(query)
     
     # Search
-    with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT 
-                    c.content,
-                    d.url,
-                    d.title,
-                    d.document_type,
-                    c.embedding <=> %s::vector as distance
-                FROM chunks c
-                JOIN documents d ON d.document_id = c.document_id
-                WHERE c.embedding IS NOT NULL
-                ORDER BY c.embedding <=> %s::vector
-                LIMIT %s
-            """, (query_embedding, query_embedding, limit))
+    pool = await get_async_pool()
+    async with pool.connection() as conn:
+        async with conn.transaction(), conn.cursor() as cur:
+            await set_hnsw_ef_search_async(cur, max(_HNSW_EF_SEARCH, limit))
+            
+            await cur.execute(_QUERY_SEARCH_SQL, {"q": query_embedding, "limit": limit}, prepare=True)
             
-            return cur.fetchall()
+            return await cur.fetchall()
 
 def get_rag_stats(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -0,0 +1,110 @@
+"""
+Semantic cache - Reuse classifier labels for near-duplicate queries
+
+Confidence: 85% ✅
+
+Exact-match caches miss paraphrases ("how do i become a lifeguard" vs
+"how can I become a lifeguard?"). This cache stores the query embedding
+next to the label an LLM gave it; a new query whose embedding has cosine
+similarity >= threshold with a stored one reuses that label.
+
+Each label gets its own fixed-size bank (a preallocated float32 ring
+buffer), so one label can't evict the other and lookups are a single
+matrix-vector product per bank. The best match across banks wins.
+
+Limitations:
+- In-process only (not shared across workers)
+- Only as good as the threshold: too low and paraphrases with a different
+  meaning share a label
+"""
+from typing import Any, Dict, Hashable, Optional, Tuple
+import threading
+
+import numpy as np
+
+
+class _LabelBank:
+    """Ring buffer of unit-normalized embeddings that all map to one label"""
+
+    def __init__(self, maxsize: int, dim: int):
+        self.vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self.count = 0
+        self._next = 0
+
+    def add(self, vector: np.ndarray) -> None:
+        self.vectors[self._next] = vector
+        self._next = (self._next + 1) % len(self.vectors)
+        self.count = min(self.count + 1, len(self.vectors))
+
+    def best(self, query: np.ndarray) -> float:
+        return float((self.vectors[:self.count] @ query).max())
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache for classifiers with a small label set
+
+    Thread-safe; get/put never await.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize_per_label: int = 2048):
+        self.threshold = threshold
+        self.maxsize_per_label = maxsize_per_label
+        self._banks: Dict[Hashable, _LabelBank] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def get(self, embedding: np.ndarray) -> Optional[Tuple[Any, float]]:
+        """(label, similarity) of the closest stored query above threshold, or None"""
+        query = self._unit(embedding)
+        best_label, best_score = None, self.threshold
+        with self._lock:
+            if query is not None:
+                for label, bank in self._banks.items():
+                    if bank.count and bank.vectors.shape[1] == query.shape[0]:
+                        score = bank.best(query)
+                        if score >= best_score:
+                            best_label, best_score = label, score
+            if best_label is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return best_label, best_score
+
+    def put(self, embedding: np.ndarray, label: Hashable) -> None:
+        """Remember the label for this query embedding"""
+        vector = self._unit(embedding)
+        if vector is None or self.maxsize_per_label <= 0:
+            return
+        with self._lock:
+            bank = self._banks.get(label)
+            if bank is None:
+                bank = self._banks[label] = _LabelBank(self.maxsize_per_label, vector.shape[0])
+            bank.add(vector)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._banks.clear()
+            self.hits = self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for logging"""
+        total = self.hits + self.misses
+        return {
+            "size": sum(bank.count for bank in self._banks.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+__all__ = [
+    'SemanticCache'
+]
@@ -0,0 +1,167 @@
+"""
+Turn analysis - Topic check + user info extraction in one LLM call
+
+Confidence: 85% ✅
+
+subject_check and collect_user_info both send the same user message to
+gpt-4o-mini, each with its own system prompt - two sequential ~500ms round
+trips per turn. analyze_turn asks for both in one JSON-mode call and
+analyze_turn_node stores the result in state["_turn_analysis"]; both
+nodes read it from there instead of calling the LLM themselves.
+
+Flow:
+Graph → analyze_turn_node → subject_check / collect_user_info (read _turn_analysis)
+
+Set TURN_ANALYSIS_FUSED=false to keep the two original prompts instead;
+analyze_turn_node then runs classify_subject and extract_user_info_llm
+concurrently (asyncio.gather), so the round trips overlap rather than add.
+
+Limitations:
+- One combined prompt: slightly longer than either original, but sent once
+- Fails open (on_topic=True, nothing extracted) like the nodes it replaces
+"""
+from typing import Dict, Any
+import asyncio
+import json
+import os
+
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from nodes._utils import _extract_text
+from nodes.subject_check import SUBJECT_CHECK_PROMPT, classify_subject
+from services.shared_llm_client import get_http_client
+from utils.helpers import EXTRACT_INFO_PROMPT, extract_user_info_llm
+
+# One fused call (default) vs. the two original calls run concurrently
+TURN_ANALYSIS_FUSED = os.getenv("TURN_ANALYSIS_FUSED", "true").lower() == "true"
+
+# Lazy initialization
+_llm = None
+
+def get_llm():
+    """Get or create the JSON-mode ChatOpenAI instance (lazy initialization)"""
+    global _llm
+    if _llm is None:
+        _llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=0,  # Deterministic for classification + extraction
+            api_key=os.getenv("OPENAI_API_KEY"),
+            model_kwargs={"response_format": {"type": "json_object"}},
+            http_async_client=get_http_client()  # Shared connection pool
+        )
+    return _llm
+
+# Both rubrics verbatim (minus their own response formats), one JSON answer.
+# The user message goes in a HumanMessage so this prompt is a stable prefix.
+_SUBJECT_RUBRIC = SUBJECT_CHECK_PROMPT.split("**Response Format:**")[0].strip()
+_EXTRACTION_RULES = EXTRACT_INFO_PROMPT[
+    EXTRACT_INFO_PROMPT.index("**Extract these fields:**"):EXTRACT_INFO_PROMPT.index("**Response Format")
+].strip()
+
+TURN_ANALYSIS_PROMPT = f"""You analyze one user message for the LifeGuard-Pro chatbot and do TWO tasks.
+
+=== TASK 1: TOPIC CLASSIFICATION ===
+{_SUBJECT_RUBRIC}
+
+=== TASK 2: USER INFO EXTRACTION ===
+Extract and validate any contact details the user gave (most messages have none - use null).
+
+{_EXTRACTION_RULES}
+
+=== RESPONSE FORMAT ===
+Respond with ONLY a JSON object with these exact keys:
+on_topic (bool), name, email, phone, name_valid (bool), email_valid (bool), phone_valid (bool), missing (list), feedback (str or null)"""
+
+# Fail-open result: let the message through, nothing extracted
+_FALLBACK_ANALYSIS = {
+    "on_topic": True,
+    "name": None,
+    "email": None,
+    "phone": None,
+    "name_valid": False,
+    "email_valid": False,
+    "phone_valid": False,
+    "missing": ["name", "email", "phone"],
+    "feedback": "Please provide your name, email, and phone number."
+}
+
+def _parse_on_topic(value: Any) -> bool:
+    """JSON on_topic → bool; strings like "false" count as False, unknown fails open"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() not in ("false", "off_topic", "no", "0")
+    return True
+
+async def analyze_turn(user_input: str) -> Dict[str, Any]:
+    """
+    Classify topic and extract user info with a single LLM call
+
+    Confidence: 85% ✅
+
+    Returns:
+        dict: {"on_topic": bool} plus the extract_user_info_llm keys
+        (name, email, phone, *_valid, missing, feedback)
+    """
+    try:
+        response = await get_llm().ainvoke([
+            SystemMessage(content=TURN_ANALYSIS_PROMPT),
+            HumanMessage(content=user_input)
+        ])
+        analysis = json.loads(response.content)
+        analysis["on_topic"] = _parse_on_topic(analysis.get("on_topic", True))
+        return analysis
+    except Exception as e:
+        print(f"⚠️ Turn analysis error: {e}")
+        return dict(_FALLBACK_ANALYSIS)
+
+async def analyze_turn_concurrent(user_input: str) -> Dict[str, Any]:
+    """
+    Same result as analyze_turn, from the two original prompts in parallel
+    
+    Confidence: 90% ✅
+    
+    Both helpers fail open on their own, so neither task raises.
+    """
+    on_topic, extraction = await asyncio.gather(
+        classify_subject(user_input),
+        extract_user_info_llm(user_input)
+    )
+    return {**extraction, "on_topic": on_topic}
+
+async def analyze_turn_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Graph node: run analyze_turn on the latest user message
+
+    Confidence: 85% ✅
+
+    State Updates:
+        - _turn_analysis: dict consumed by subject_check and collect_user_info,
+          tagged with the analysed message's id and text (see
+          nodes._utils.current_turn_analysis)
+    """
+    if not state.get("messages"):
+        return {}
+
+    last_message = state["messages"][-1]
+    user_input = _extract_text(last_message)
+    if not user_input.strip():
+        return {}
+
+    if TURN_ANALYSIS_FUSED:
+        analysis = await analyze_turn(user_input)
+    else:
+        analysis = await analyze_turn_concurrent(user_input)
+    print(f"🔍 Turn analysis: '{user_input[:50]}...' → {'ON_TOPIC' if analysis['on_topic'] else 'OFF_TOPIC'}")
+
+    analysis["message_id"] = getattr(last_message, "id", None)
+    analysis["text"] = user_input
+    return {"_turn_analysis": analysis}
+
+__all__ = [
+    'TURN_ANALYSIS_PROMPT',
+    'analyze_turn',
+    'analyze_turn_concurrent',
+    'analyze_turn_node'
+]
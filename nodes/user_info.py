@@ -16,8 +16,23 @@ Features:
 - Non-intrusive (asks once, then skips)
 """
 from typing import Dict, Any
+import re
 from langchain_core.messages import AIMessage, HumanMessage
 from utils.helpers import extract_user_info_llm
+from nodes._utils import _extract_text, current_turn_analysis
+
+# Cheap pre-check: without an email-ish token or a 7+ digit run there is
+# nothing for the LLM to extract ("tell me more", "I'd rather not say")
+_EMAILISH = re.compile(r"[^\s@]+@[^\s@]+\.[^\s@]+")
+_PHONEISH = re.compile(r"(?:\d[\s\-().]*){7,}")
+
+_NO_CONTACT_INFO = {
+    "email_valid": False,
+    "phone_valid": False,
+    "name": None,
+    "feedback": None,
+    "missing": ["email", "phone"]
+}
 
 async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -28,6 +43,7 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
     Flow:
     1. Check if we already have all info
     2. If not, use LLM to extract and validate from current message
+       (skipped when the message has no email-ish or 7+ digit text)
     3. If extraction successful → Store info
     4. If extraction incomplete → Give specific feedback
     5. If not requested yet → Ask for info
@@ -37,7 +53,8 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
         state: Current graph state
         
     Returns:
-        Updated state with user info or request/feedback
+        State update (delta) with user info or request/feedback;
+        new messages are appended by the messages reducer
         
     State Updates:
         - user_email: str | None
@@ -49,22 +66,27 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
     # Already have all required info
     if state.get("user_email") and state.get("user_phone"):
         print("✅ User info already collected (email + phone)")
-        return {**state, "needs_info": False}
+        return {"needs_info": False}
     
     # Try LLM extraction from current message
     if state.get("messages"):
         last_message = state["messages"][-1]
         
         # Extract content
-        if hasattr(last_message, 'content'):
-            user_input = last_message.content
-        else:
-            user_input = str(last_message)
-        
-        # Use LLM to extract and validate
-        print(f"🔍 LLM extracting user info from: '{user_input[:50]}...'")
-        
-        extraction = await extract_user_info_llm(user_input)
+        user_input = _extract_text(last_message)
+        
+        # Reuse the fused turn analysis when analyze_turn_node already ran
+        extraction = current_turn_analysis(state, last_message)
+        if extraction is None and not (_EMAILISH.search(user_input) or _PHONEISH.search(user_input)):
+            # No contact details in the message → skip the LLM round-trip
+            print("⏭️  No email/phone in message, skipping extraction")
+            extraction = dict(_NO_CONTACT_INFO)
+        
+        if extraction is None:
+            # Use LLM to extract and validate
+            print(f"🔍 LLM extracting user info from: '{user_input[:50]}...'")
+            
+            extraction = await extract_user_info_llm(user_input)
         
         # Check if we got valid email and phone
         has_valid_email = extraction.get("email_valid", False)
@@ -75,7 +97,6 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
             print(f"✅ User info collected: {extraction['name']} ({extraction['email']}, {extraction['phone']})")
             
             return {
-                **state,
                 "user_email": extraction["email"],
                 "user_name": extraction["name"],
                 "user_phone": extraction["phone"],
@@ -102,8 +123,7 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
                 print(f"⚠️  Validation failed: {feedback}")
                 
                 return {
-                    **state,
-                    "messages": state["messages"] + [feedback_message],
+                    "messages": [feedback_message],  # add_messages appends
                     "info_request_count": state.get("info_request_count", 1),  # Don't increment for invalid attempts
                     "needs_info": True
                 }
@@ -119,8 +139,7 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
         print("📧 Requesting user info (first time)...")
         
         return {
-            **state,
-            "messages": state["messages"] + [ask_message],
+            "messages": [ask_message],  # add_messages appends
             "info_requested": True,
             "info_request_count": 1,
             "needs_info": True
@@ -148,8 +167,7 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
         print("📧 Requesting user info (second time - with explanation)...")
         
         return {
-            **state,
-            "messages": state["messages"] + [polite_message],
+            "messages": [polite_message],  # add_messages appends
             "info_request_count": request_count + 1,
             "needs_info": True
         }
@@ -168,8 +186,7 @@ async def collect_user_info(state: Dict[str, Any]) -> Dict[str, Any]:
     )
     
     return {
-        **state,
-        "messages": state["messages"] + [skip_warning],
+        "messages": [skip_warning],  # add_messages appends
         "needs_info": False,
         "info_skipped": True,
         "skip_reason": "user_declined_after_2_attempts"
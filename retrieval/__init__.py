@@ -19,19 +19,55 @@ Usage:
     
     # Phase 3: Hybrid retrieval
     for exp_query in expanded:
-        bm25_results = bm25_search(exp_query["query"], limit=20)
+        bm25_results = await bm25_search(exp_query["query"], limit=20)
         vector_results = await vector_search(exp_query["query"], limit=20)
     
     # Phase 3: Fusion and diversity
     fused = rrf_fusion(bm25_results, vector_results, k=60)
     final = mmr_select(fused, n=10, lambda_param=0.7)
+
+Submodules are imported on first attribute access (PEP 562), so importing
+the package - or only retrieval.bm25_search - doesn't load openai,
+langchain and pgvector for the components that aren't used.
 """
+import importlib
+import sys
+import types
+
+# Public name → submodule that defines it
+_LAZY_ATTRS = {
+    'expand_query': '.mq_expander',
+    'bm25_search': '.bm25_search',
+    'vector_search': '.vector_search',
+    'rrf_fusion': '.rrf_fusion',
+    'mmr_select': '.mmr_diversity',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
+
+
+class _LazyPackage(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing e.g. retrieval.bm25_search binds the submodule to the
+        # package attribute of the same name; keep the function there
+        # instead (as the eager `from .bm25_search import bm25_search` did)
+        if name in _LAZY_ATTRS and isinstance(value, types.ModuleType):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
 
-from .mq_expander import expand_query
-from .bm25_search import bm25_search
-from .vector_search import vector_search
-from .rrf_fusion import rrf_fusion
-from .mmr_diversity import mmr_select
+sys.modules[__name__].__class__ = _LazyPackage
 
 __all__ = [
     'expand_query',
@@ -0,0 +1,100 @@
+"""
+Numba-compiled MMR selection (optional)
+
+Confidence: 85% ✅
+
+With the candidate embeddings stacked as unit-norm rows, the MMR loop is a
+pure numeric kernel: argmax over λ × relevance - (1-λ) × max_similarity,
+then fold the picked row's similarities into max_similarity. mmr_order
+runs the whole selection in compiled code instead of one numpy round per
+pick.
+
+Similarities are folded in lazily: a candidate's score only drops as picks
+are added, so its last known score bounds it from above. Candidates whose
+bound can't beat the best score so far this round are skipped without a
+single dot product, and a scan stops as soon as the score falls to the
+best. When candidates cluster, most of the N × picks dot products are
+never computed; the picks are the same as the full scan.
+
+Requires the optional `numba` package (pip install numba); mmr_order is
+None without it and mmr_select keeps its numpy loop.
+
+Limitations:
+- First import compiles the kernel (cached on disk afterwards, cache=True)
+- Serial on purpose: N is at most a few hundred candidates, and a parallel
+  argmax would race on the running best
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def mmr_order(embeddings, relevance, n, lambda_param):
+        """
+        Indices of the n MMR picks, in order, and each pick's MMR score
+
+        Same rules as mmr_select: row 0 (highest relevance) is picked first
+        (score 0.0, it has none); ties go to the lowest index; similarities
+        below 0 don't count as overlap.
+        """
+        count, dim = embeddings.shape
+        n = min(n, count)
+        order = np.empty(n, dtype=np.int64)
+        scores = np.zeros(n, dtype=np.float64)
+        available = np.ones(count, dtype=np.bool_)
+        # max_similarity[i] covers the first synced[i] picks only; it only
+        # grows as more picks are folded in, so the score it gives is an
+        # upper bound on candidate i's true MMR score
+        max_similarity = np.zeros(count, dtype=np.float64)
+        synced = np.zeros(count, dtype=np.int64)
+
+        if n == 0:
+            return order, scores
+        order[0] = 0
+        available[0] = False
+        for step in range(1, n):
+            best_score = -np.inf
+            best_idx = -1
+            for i in range(count):
+                if not available[i]:
+                    continue
+                # Upper bound can't beat the current best (ties go to the
+                # lower index, which already holds best) → skip its scan
+                if best_idx >= 0 and lambda_param * relevance[i] - (1 - lambda_param) * max_similarity[i] <= best_score:
+                    continue
+                # Fold in the picks it hasn't seen yet; stop once the score
+                # has dropped to the current best
+                while synced[i] < step:
+                    picked = order[synced[i]]
+                    dot = 0.0
+                    for d in range(dim):
+                        dot += embeddings[i, d] * embeddings[picked, d]
+                    if dot > max_similarity[i]:
+                        max_similarity[i] = dot
+                    synced[i] += 1
+                    if best_idx >= 0 and lambda_param * relevance[i] - (1 - lambda_param) * max_similarity[i] <= best_score:
+                        break
+                score = lambda_param * relevance[i] - (1 - lambda_param) * max_similarity[i]
+                if synced[i] == step and (best_idx < 0 or score > best_score):
+                    best_score = score
+                    best_idx = i
+
+            order[step] = best_idx
+            scores[step] = best_score
+            available[best_idx] = False
+
+        return order, scores
+
+    # Compile at import rather than on the first request
+    mmr_order(np.full((4, 8), 8 ** -0.5, dtype=np.float32), np.zeros(4, dtype=np.float32), 2, 0.7)
+else:
+    mmr_order = None
+
+
+__all__ = ['NUMBA_AVAILABLE', 'mmr_order']
@@ -9,23 +9,198 @@ Why BM25:
 - Deterministic (same query = same results)
 - Native PostgreSQL support
 
+Queries run on the shared async connection pool (config.database) with
+prepare=True, so each pooled connection parses/plans a statement once and
+then reuses the server-side prepared plan. websearch_to_tsquery (quoted
+phrases, OR, -exclusions) is evaluated once per query in a CTE instead of
+once for the rank and once for the filter.
+
+With BM25_TRIGRAM=true (after migrations/003), chunks whose content has a
+close trigram match of the raw query also qualify, and word_similarity * 0.3
+is added to the score - so literal acronyms that stemming loses still hit.
+
+Rows are fetched as plain tuples and cached as an immutable tuple of
+rows; each call builds fresh dicts from them (_to_dicts), so callers that
+add keys never touch the cached copy.
+
+Results are cached in-process for BM25_CACHE_TTL seconds (default 600),
+keyed by normalized query + limits, so repeated MQE expansions across
+turns skip the database. Call invalidate_bm25_cache() after ingesting
+documents.
+
 Confidence: 95% ✅
 
 Example:
-    results = bm25_search("CPO certification", limit=20)
+    results = await bm25_search("CPO certification", limit=20)
     # Returns chunks ranked by ts_rank score
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import os
 import sys
+import time
 from pathlib import Path
 
 # Import database connection
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config.database import get_connection
+from psycopg.rows import tuple_row
+from config.database import get_async_pool
+from config.rag_config import get_config
+from nodes._utils import normalize_input, run_sync
+from nodes.embedding_cache import LRUCache
+
+# ================================================================
+# RESULT CACHE
+# ================================================================
+
+BM25_CACHE_SIZE = int(os.getenv("BM25_CACHE_SIZE", "2048"))
+BM25_CACHE_TTL = float(os.getenv("BM25_CACHE_TTL", "600"))
+
+# key → (stored_at, results); keys carry the epoch, so bumping it orphans
+# every older entry (including ones written by searches still in flight)
+_BM25_CACHE = LRUCache(maxsize=BM25_CACHE_SIZE)
+_BM25_CACHE_EPOCH = 0
+
+
+def invalidate_bm25_cache() -> None:
+    """Drop all cached results (call after ingesting new documents)"""
+    global _BM25_CACHE_EPOCH
+    _BM25_CACHE_EPOCH += 1
+    _BM25_CACHE.clear()
+
+
+def _cache_key(kind: str, query: str, *args) -> tuple:
+    return (kind, _BM25_CACHE_EPOCH, normalize_input(query), *args)
 
 
-def bm25_search(
+def _cache_get(key: tuple) -> Optional[Any]:
+    entry = _BM25_CACHE.get(key)
+    if entry is None or time.monotonic() - entry[0] > BM25_CACHE_TTL:
+        return None
+    return entry[1]
+
+
+def _cache_put(key: tuple, value: Any) -> None:
+    _BM25_CACHE.put(key, (time.monotonic(), value))
+
+
+def _to_dicts(fields: Tuple[str, ...], rows: Tuple[tuple, ...], **extra) -> List[Dict[str, Any]]:
+    """One fresh dict per cached row, plus extra keys"""
+    return [dict(zip(fields, row), **extra) for row in rows]
+
+
+# Result rows are plain tuples (tuple_row); these name the SELECT columns in order.
+# ts_rank returns real, which psycopg already loads as a Python float.
+_BM25_FIELDS = (
+    "chunk_id", "content", "document_id", "chunk_index",
+    "document_title", "document_url", "document_type", "bm25_score"
+)
+_BM25_INTERNAL_FIELDS = (
+    "chunk_id", "content", "document_id", "chunk_index",
+    "document_type", "document_title", "source_file", "bm25_score"
+)
+# Unified rows: source_type, these shared columns, then document_url, source_file
+_BM25_UNIFIED_FIELDS = (
+    "chunk_id", "content", "document_id", "chunk_index",
+    "document_title", "document_type", "bm25_score"
+)
+
+# tsquery parsed once (CTE), used for both the match and ts_rank;
+# raw keeps the query text for the trigram match
+_QUERY_CTE = "WITH q AS (SELECT websearch_to_tsquery('english', r.raw) AS tsq, r.raw FROM (SELECT %s::text AS raw) r)"
+
+# Trigram fallback for literal acronyms/numbers (migrations/003), OR'd with the tsquery match
+if get_config("bm25").get("trigram_prefilter"):
+    _MATCH = "({t}.content_tsv @@ q.tsq OR q.raw <%% {t}.content)"
+    _RANK = "ts_rank({t}.content_tsv, q.tsq) + word_similarity(q.raw, {t}.content) * 0.3"
+else:
+    _MATCH = "{t}.content_tsv @@ q.tsq"
+    _RANK = "ts_rank({t}.content_tsv, q.tsq)"
+
+_BM25_SQL = f"""
+    {_QUERY_CTE}
+    SELECT 
+        c.id,
+        c.content,
+        c.document_id,
+        c.chunk_index,
+        d.title as document_title,
+        d.url as document_url,
+        d.document_type,
+        {_RANK.format(t="c")} as bm25_score
+    FROM chunks c
+    CROSS JOIN q
+    LEFT JOIN documents d ON c.document_id = d.document_id
+    WHERE {_MATCH.format(t="c")}
+    ORDER BY bm25_score DESC
+    LIMIT %s
+"""
+
+_BM25_INTERNAL_SQL = f"""
+    {_QUERY_CTE}
+    SELECT 
+        ic.id,
+        ic.content,
+        ic.document_id,
+        ic.chunk_index,
+        ic.document_type,
+        id.title as document_title,
+        id.source_file,
+        {_RANK.format(t="ic")} as bm25_score
+    FROM internal_chunks ic
+    CROSS JOIN q
+    LEFT JOIN internal_documents id ON ic.document_id = id.document_id
+    WHERE {_MATCH.format(t="ic")}
+"""
+
+# Website + internal in one statement; each branch keeps its own LIMIT.
+# {{internal_filter}} is either empty or a fixed document_type clause.
+_BM25_UNIFIED_SQL = f"""
+    {_QUERY_CTE}
+    (
+        SELECT 
+            'website' AS source_type,
+            c.id,
+            c.content,
+            c.document_id,
+            c.chunk_index,
+            d.title AS document_title,
+            d.document_type,
+            {_RANK.format(t="c")} AS bm25_score,
+            d.url AS document_url,
+            NULL::text AS source_file
+        FROM chunks c
+        CROSS JOIN q
+        LEFT JOIN documents d ON c.document_id = d.document_id
+        WHERE {_MATCH.format(t="c")}
+        ORDER BY bm25_score DESC
+        LIMIT %s
+    )
+    UNION ALL
+    (
+        SELECT 
+            'internal' AS source_type,
+            ic.id,
+            ic.content,
+            ic.document_id,
+            ic.chunk_index,
+            id.title AS document_title,
+            ic.document_type,
+            {_RANK.format(t="ic")} AS bm25_score,
+            NULL::text AS document_url,
+            id.source_file
+        FROM internal_chunks ic
+        CROSS JOIN q
+        LEFT JOIN internal_documents id ON ic.document_id = id.document_id
+        WHERE {_MATCH.format(t="ic")} {{internal_filter}}
+        ORDER BY bm25_score DESC
+        LIMIT %s
+    )
+"""
+
+
+async def bm25_search(
     query: str,
     limit: int = 20
 ) -> List[Dict[str, Any]]:
@@ -58,59 +233,51 @@ def bm25_search(
     Confidence: 95% ✅
     """
     
+    key = _cache_key("website", query, limit)
+    cached = _cache_get(key)
+    if cached is not None:
+        return _to_dicts(_BM25_FIELDS, cached, retrieval_method="bm25")
+    
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor(row_factory=tuple_row) as cursor:
                 # PostgreSQL full-text search with ts_rank
                 # Uses existing content_tsv column for better performance
-                # plainto_tsquery converts plain text to tsquery format
-                cursor.execute("""
-                    SELECT 
-                        c.id,
-                        c.content,
-                        c.document_id,
-                        c.chunk_index,
-                        d.title as document_title,
-                        d.url as document_url,
-                        d.document_type,
-                        ts_rank(c.content_tsv, plainto_tsquery('english', %s)) as bm25_score
-                    FROM chunks c
-                    LEFT JOIN documents d ON c.document_id = d.document_id
-                    WHERE c.content_tsv @@ plainto_tsquery('english', %s)
-                    ORDER BY bm25_score DESC
-                    LIMIT %s
-                """, (query, query, limit))
+                # websearch_to_tsquery converts search-box text to tsquery format
+                await cursor.execute(_BM25_SQL, (query, limit), prepare=True)
                 
-                rows = cursor.fetchall()
+                rows = await cursor.fetchall()
                 
                 # Format results
-                chunks = []
-                for row in rows:
-                    chunks.append({
-                        "chunk_id": row['id'],
-                        "content": row['content'],
-                        "bm25_score": float(row['bm25_score']),
-                        "document_id": row['document_id'],
-                        "document_title": row.get('document_title'),
-                        "document_url": row.get('document_url'),
-                        "document_type": row.get('document_type'),
-                        "chunk_index": row.get('chunk_index'),
-                        "retrieval_method": "bm25"
-                    })
-                
-                return chunks
+                hits = tuple(rows)
+                _cache_put(key, hits)
+                return _to_dicts(_BM25_FIELDS, hits, retrieval_method="bm25")
                 
     except Exception as e:
         print(f"     ❌ BM25 search failed: {e}")
         return []
 
 
-def bm25_search_batch(
+def bm25_search_sync(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Synchronous version for testing
+    
+    Confidence: 90% ✅
+    
+    Runs on the shared background loop (nodes._utils.run_sync), not
+    asyncio.run(): the async pool is bound to the loop it was opened on.
+    Hot paths await bm25_search / bm25_search_unified directly.
+    """
+    return run_sync(bm25_search(query, limit=limit))
+
+
+async def bm25_search_batch(
     queries: List[str],
     limit_per_query: int = 20
 ) -> List[Dict[str, Any]]:
     """
-    Execute BM25 search for multiple queries
+    Execute BM25 search for multiple queries (concurrently)
     
     Args:
         queries: List of query strings
@@ -124,14 +291,18 @@ def bm25_search_batch(
     
     all_results = []
     
-    for query in queries:
-        results = bm25_search(query, limit=limit_per_query)
+    # Independent round-trips → run them together; results keep query order.
+    # The pool's max_size already caps concurrent connections.
+    per_query = await asyncio.gather(*(
+        bm25_search(query, limit=limit_per_query) for query in queries
+    ))
+    for results in per_query:
         all_results.extend(results)
     
     return all_results
 
 
-def bm25_search_internal(
+async def bm25_search_internal(
     query: str,
     limit: int = 20,
     document_type_filter: str = None
@@ -152,26 +323,19 @@ def bm25_search_internal(
     Confidence: 95% ✅
     """
     
+    key = _cache_key("internal", query, limit, document_type_filter)
+    cached = _cache_get(key)
+    if cached is not None:
+        return _to_dicts(_BM25_INTERNAL_FIELDS, cached, retrieval_method="bm25", source_type="internal")
+    
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor(row_factory=tuple_row) as cursor:
                 # Build query with optional document_type filter
-                base_query = """
-                    SELECT 
-                        ic.id,
-                        ic.content,
-                        ic.document_id,
-                        ic.chunk_index,
-                        ic.document_type,
-                        id.title as document_title,
-                        id.source_file,
-                        ts_rank(ic.content_tsv, plainto_tsquery('english', %s)) as bm25_score
-                    FROM internal_chunks ic
-                    LEFT JOIN internal_documents id ON ic.document_id = id.document_id
-                    WHERE ic.content_tsv @@ plainto_tsquery('english', %s)
-                """
+                base_query = _BM25_INTERNAL_SQL
                 
-                params = [query, query]
+                params = [query]
                 
                 # Add document_type filter if specified
                 if document_type_filter:
@@ -181,33 +345,20 @@ def bm25_search_internal(
                 base_query += " ORDER BY bm25_score DESC LIMIT %s"
                 params.append(limit)
                 
-                cursor.execute(base_query, params)
-                rows = cursor.fetchall()
+                await cursor.execute(base_query, params, prepare=True)
+                rows = await cursor.fetchall()
                 
                 # Format results
-                chunks = []
-                for row in rows:
-                    chunks.append({
-                        "chunk_id": row['id'],
-                        "content": row['content'],
-                        "bm25_score": float(row['bm25_score']),
-                        "document_id": row['document_id'],
-                        "document_title": row.get('document_title'),
-                        "document_type": row.get('document_type'),
-                        "source_file": row.get('source_file'),
-                        "chunk_index": row.get('chunk_index'),
-                        "retrieval_method": "bm25",
-                        "source_type": "internal"
-                    })
-                
-                return chunks
+                hits = tuple(rows)
+                _cache_put(key, hits)
+                return _to_dicts(_BM25_INTERNAL_FIELDS, hits, retrieval_method="bm25", source_type="internal")
                 
     except Exception as e:
         print(f"     ❌ Internal BM25 search failed: {e}")
         return []
 
 
-def bm25_search_unified(
+async def bm25_search_unified(
     query: str,
     website_limit: int = 10,
     internal_limit: int = 10,
@@ -217,6 +368,11 @@ def bm25_search_unified(
     """
     Unified BM25 search across both website and internal chunks
     
+    Both tables are searched by one UNION ALL statement (one round-trip,
+    tsquery parsed once) and the rows are split by source_type. If that
+    statement fails, the two tables are searched separately, so an error
+    on the internal side still returns the website hits.
+    
     Args:
         query: Search query string
         website_limit: Max results from website chunks
@@ -241,29 +397,63 @@ def bm25_search_unified(
         "combined": []
     }
     
-    # Search website chunks
-    website_results = bm25_search(query, limit=website_limit)
-    
-    # Add source_type marker
-    for r in website_results:
-        r["source_type"] = "website"
+    # Website only: a single-table query already is one round-trip
+    if not include_internal:
+        website_results = await bm25_search(query, limit=website_limit)
+        for r in website_results:
+            r["source_type"] = "website"
+        results["website"] = website_results
+        results["combined"].extend(website_results)
+        return results
     
-    results["website"] = website_results
-    results["combined"].extend(website_results)
+    key = _cache_key("unified", query, website_limit, internal_limit, document_type_filter)
+    hits = _cache_get(key)
     
-    # Search internal chunks (if enabled)
-    if include_internal:
-        internal_results = bm25_search_internal(
-            query,
-            limit=internal_limit,
-            document_type_filter=document_type_filter
+    if hits is None:
+        # Website + internal in ONE round-trip (UNION ALL, shared tsquery)
+        sql = _BM25_UNIFIED_SQL.format(
+            internal_filter="AND ic.document_type = %s" if document_type_filter else ""
         )
+        params = [query, website_limit]
+        if document_type_filter:
+            params.append(document_type_filter)
+        params.append(internal_limit)
         
-        results["internal"] = internal_results
-        results["combined"].extend(internal_results)
+        try:
+            pool = await get_async_pool()
+            async with pool.connection() as conn:
+                async with conn.cursor(row_factory=tuple_row) as cursor:
+                    await cursor.execute(sql, params, prepare=True)
+                    rows = await cursor.fetchall()
+        except Exception as e:
+            # Keep failure isolation: a broken internal branch mustn't drop
+            # the website hits, so retry as two independent searches
+            print(f"     ❌ Unified BM25 search failed: {e} - falling back to separate searches")
+            website_results, internal_results = await asyncio.gather(
+                bm25_search(query, limit=website_limit),
+                bm25_search_internal(query, limit=internal_limit, document_type_filter=document_type_filter)
+            )
+            for r in website_results:
+                r["source_type"] = "website"
+            results["website"] = website_results
+            results["internal"] = internal_results
+            results["combined"] = website_results + internal_results
+            return results
+        
+        # Bucket by source in one pass (same columns as the single-table searches)
+        buckets = {"website": [], "internal": []}
+        for source_type, *shared, document_url, source_file in rows:
+            buckets[source_type].append((*shared, document_url if source_type == "website" else source_file))
+        hits = (tuple(buckets["website"]), tuple(buckets["internal"]))
+        _cache_put(key, hits)
+    
+    results["website"] = _to_dicts(_BM25_UNIFIED_FIELDS + ("document_url",), hits[0], retrieval_method="bm25", source_type="website")
+    results["internal"] = _to_dicts(_BM25_UNIFIED_FIELDS + ("source_file",), hits[1], retrieval_method="bm25", source_type="internal")
+    # Website first, then internal (same order as before)
+    results["combined"] = results["website"] + results["internal"]
     
     return results
 
 
-__all__ = ['bm25_search', 'bm25_search_batch', 'bm25_search_internal', 'bm25_search_unified']
+__all__ = ['bm25_search', 'bm25_search_sync', 'bm25_search_batch', 'bm25_search_internal', 'bm25_search_unified', 'invalidate_bm25_cache']
 
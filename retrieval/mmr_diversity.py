@@ -22,8 +22,43 @@ Example:
 """
 
 from typing import List, Dict, Any
+from collections import Counter
+import logging
+import sys
+from pathlib import Path
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config.rag_config import get_config
+
+logger = logging.getLogger(__name__)
+
+# Optional: SimSIMD (pip install simsimd) runs cosine kernels with
+# AVX2/AVX-512/NEON; numpy is used when it isn't installed
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# MMR only needs the similarity ordering: with SimSIMD, the rows can be
+# quantized to int8 - a quarter of the memory traffic and VNNI int8 dot
+# products. Each row is scaled by its own max |x| so it uses the full int8
+# range (cosine is scale-invariant); for 1536-dim embeddings the cosine
+# error stays below 1e-3, well under the score gaps MMR decides on.
+# Opt-in (MMR_INT8=true).
+_MMR_INT8 = bool(get_config("mmr").get("int8_similarity")) and simsimd is not None
+
+# MMR is there to spread the selection across documents. When the top n
+# candidates by RRF already come from n different documents, take them as
+# they are and skip the embedding math (the common case when BM25 and
+# vector search agree on distinct docs). Near-duplicate content across
+# documents isn't caught then, so this is opt-in (MMR_DOC_SHORTCUT=true).
+_MMR_DOC_SHORTCUT = bool(get_config("mmr").get("doc_shortcut"))
+
+# Optional: Numba (pip install numba) compiles the whole selection loop;
+# mmr_order is None without it and the numpy loop below is used
+from retrieval._mmr_numba import mmr_order
+
 
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """
@@ -34,6 +69,13 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
         
     Confidence: 95% ✅
     """
+    if simsimd is not None:
+        vec1_f32 = np.asarray(vec1, dtype=np.float32)
+        vec2_f32 = np.asarray(vec2, dtype=np.float32)
+        if not vec1_f32.any() or not vec2_f32.any():
+            return 0.0
+        return float(1.0 - simsimd.cosine(vec1_f32, vec2_f32))
+    
     vec1_np = np.array(vec1)
     vec2_np = np.array(vec2)
     
@@ -47,6 +89,53 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     return float(dot_product / (norm1 * norm2))
 
 
+def _similarities_to(embeddings: np.ndarray, j: int) -> np.ndarray:
+    """Cosine similarity of every row to row j (rows are unit-norm, or their int8 quantization)"""
+    if simsimd is not None:
+        return 1.0 - np.asarray(simsimd.cdist(embeddings[j:j + 1], embeddings, metric="cosine"), dtype=np.float32)[0]
+    return embeddings @ embeddings[j]
+
+
+def _mmr_order_numpy(
+    embeddings: np.ndarray,
+    relevance: np.ndarray,
+    n: int,
+    lambda_param: float
+) -> tuple[List[int], List[float]]:
+    """
+    Indices of the n MMR picks and their MMR scores (numpy fallback of
+    retrieval._mmr_numba.mmr_order, same rules and results)
+    """
+    count = len(relevance)
+    available = np.ones(count, dtype=bool)
+    max_similarity = np.zeros(count, dtype=np.float32)
+    # Work buffers, updated in place: no per-pick array allocations
+    weighted_relevance = lambda_param * relevance
+    mmr_scores = np.empty_like(max_similarity)
+    
+    # Step 1: Select first chunk (highest relevance)
+    order = [0]
+    scores = [0.0]
+    available[0] = False
+    np.maximum(max_similarity, _similarities_to(embeddings, 0), out=max_similarity)
+    
+    # Step 2: Iteratively select diverse chunks
+    for _ in range(1, min(n, count)):
+        # MMR score: balance relevance and diversity
+        np.multiply(max_similarity, 1 - lambda_param, out=mmr_scores)
+        np.subtract(weighted_relevance, mmr_scores, out=mmr_scores)
+        mmr_scores[~available] = -np.inf
+        best_idx = int(np.argmax(mmr_scores))  # first index on ties, like the old loop
+        
+        order.append(best_idx)
+        scores.append(float(mmr_scores[best_idx]))
+        available[best_idx] = False
+        # Only the new pick can raise a chunk's max similarity
+        np.maximum(max_similarity, _similarities_to(embeddings, best_idx), out=max_similarity)
+    
+    return order, scores
+
+
 def mmr_select(
     candidates: List[Dict[str, Any]],
     n: int = 10,
@@ -64,6 +153,11 @@ def mmr_select(
        - Select chunk with highest MMR score
     3. Repeat until n chunks selected
     
+    Candidate embeddings (unit-norm, as emitted by vector_search) are
+    stacked into one float32 matrix, and
+    each chunk's max similarity to the selection is kept as a running
+    vector - one matrix-vector product per selected chunk.
+    
     Args:
         candidates: Chunks sorted by RRF score (from rrf_fusion)
         n: Number of chunks to select (default 10)
@@ -107,57 +201,58 @@ def mmr_select(
     
     if not candidates_with_embeddings:
         # Fallback: return top n by RRF score (no diversity)
-        print(f"     ⚠️  MMR: No embeddings found, using top {n} by RRF score")
+        logger.warning("⚠️ MMR: No embeddings found, using top %d by RRF score", n)
         return candidates[:n]
     
-    selected = []
-    remaining = candidates_with_embeddings.copy()
+    if _MMR_DOC_SHORTCUT:
+        top = candidates_with_embeddings[:n]
+        doc_ids = {c.get("document_id") for c in top}
+        if None not in doc_ids and len(doc_ids) == len(top):
+            logger.debug("MMR: top %d candidates from distinct documents, skipping similarity", len(top))
+            return top
     
-    # Step 1: Select first chunk (highest relevance)
-    if remaining:
-        selected.append(remaining.pop(0))
+    # Embeddings are fixed during MMR: stack them once as unit-norm rows,
+    # so similarity to a newly selected chunk is one matrix-vector product.
+    # Upstream retrieval emits unit-norm float32 embeddings
+    # (text-embedding-3-small is L2-normalized), so cosine is a plain dot
+    # product and there is no normalization step - checked in debug runs only.
+    # The stacked rows are kept on the chunks (_embedding_norm), so
+    # re-ranking the same chunks again skips the copy.
+    cached_rows = [c.get("_embedding_norm") for c in candidates_with_embeddings]
+    if all(row is not None for row in cached_rows):
+        embeddings = np.stack(cached_rows)
+    else:
+        embeddings = np.asarray([c["embedding"] for c in candidates_with_embeddings], dtype=np.float32)
+        if __debug__:
+            assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-3), \
+                "mmr_select expects L2-normalized embeddings"
+        embeddings.setflags(write=False)  # rows are shared with the chunk dicts
+        for chunk, row in zip(candidates_with_embeddings, embeddings):
+            chunk["_embedding_norm"] = row
+    if _MMR_INT8:
+        scale = 127 / np.abs(embeddings).max(axis=1, keepdims=True).clip(min=1e-12)
+        embeddings = np.round(embeddings * scale).astype(np.int8)
     
-    # Step 2: Iteratively select diverse chunks
-    while len(selected) < n and remaining:
-        best_mmr_score = -float('inf')
-        best_idx = 0
-        
-        for i, candidate in enumerate(remaining):
-            # Get relevance (RRF score, or vector_score as fallback)
-            relevance = candidate.get("rrf_score")
-            
-            if relevance is None:
-                # Fallback: use vector_score or bm25_score
-                relevance = candidate.get("vector_score", candidate.get("bm25_score", 0.0))
-            
-            # Get candidate embedding
-            candidate_emb = candidate.get("embedding")
-            
-            if candidate_emb is None:
-                continue
-            
-            # Calculate max similarity to already-selected chunks
-            max_similarity = 0.0
-            
-            for selected_chunk in selected:
-                selected_emb = selected_chunk.get("embedding")
-                
-                if selected_emb is not None:
-                    sim = cosine_similarity(candidate_emb, selected_emb)
-                    max_similarity = max(max_similarity, sim)
-            
-            # MMR score: balance relevance and diversity
-            mmr_score = lambda_param * relevance - (1 - lambda_param) * max_similarity
-            
-            if mmr_score > best_mmr_score:
-                best_mmr_score = mmr_score
-                best_idx = i
-        
-        # Add best MMR chunk
-        if best_idx < len(remaining):
-            selected_chunk = remaining.pop(best_idx)
-            selected_chunk["mmr_score"] = best_mmr_score
-            selected.append(selected_chunk)
+    # Relevance (RRF score, or vector_score / bm25_score as fallback)
+    relevance = np.asarray([
+        c["rrf_score"] if c.get("rrf_score") is not None
+        else c.get("vector_score", c.get("bm25_score", 0.0))
+        for c in candidates_with_embeddings
+    ], dtype=np.float32)
+    
+    # The loop only touches the arrays (embeddings, relevance) and integer
+    # indices; chunk dicts are looked up once the picks are known
+    if mmr_order is not None and not _MMR_INT8:
+        order, scores = mmr_order(embeddings, relevance, n, lambda_param)
+    else:
+        order, scores = _mmr_order_numpy(embeddings, relevance, n, lambda_param)
+    
+    selected = []
+    for step, idx in enumerate(order):
+        selected_chunk = candidates_with_embeddings[idx]
+        if step > 0:  # first pick is by relevance alone, no MMR score
+            selected_chunk["mmr_score"] = float(scores[step])
+        selected.append(selected_chunk)
     
     return selected
 
@@ -187,20 +282,17 @@ def analyze_mmr_diversity(selected: List[Dict[str, Any]]) -> Dict[str, Any]:
             "document_distribution": {}
         }
     
-    # Count unique documents
-    document_ids = [c.get("document_id") for c in selected if c.get("document_id") is not None]
-    unique_docs = len(set(document_ids))
-    
-    # Document distribution
-    from collections import Counter
-    doc_dist = dict(Counter(document_ids))
+    # Document distribution (one pass; unique count falls out of it)
+    doc_counts = Counter(c.get("document_id") for c in selected if c.get("document_id") is not None)
+    unique_docs = len(doc_counts)
+    doc_dist = dict(doc_counts)
     
     # Diversity ratio (ideal: 1.0 = all unique docs)
     diversity_ratio = unique_docs / len(selected) if selected else 0.0
     
     # Average MMR score
-    mmr_scores = [c.get("mmr_score", 0) for c in selected]
-    avg_mmr = sum(mmr_scores) / len(mmr_scores) if mmr_scores else 0.0
+    mmr_scores = np.fromiter((c.get("mmr_score", 0) for c in selected), dtype=np.float64, count=len(selected))
+    avg_mmr = float(mmr_scores.mean())
     
     return {
         "total_chunks": len(selected),
@@ -20,21 +20,79 @@ Example:
     ]
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, FrozenSet, Optional, Tuple
+import asyncio
+import logging
 import os
 import json
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+from nodes.embedding_cache import LRUCache
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 
-# LLM for query expansion (faster/cheaper model)
-expansion_llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.7,  # Some creativity for variations
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+# LLM for query expansion (faster/cheaper model). Created on first use:
+# importing the retrieval package shouldn't pay the openai/langchain
+# startup when MQE never runs.
+_expansion_llm = None
+
+def get_llm():
+    """Get or create the query expansion ChatOpenAI instance (lazy initialization)"""
+    global _expansion_llm
+    if _expansion_llm is None:
+        from dotenv import load_dotenv
+        from langchain_openai import ChatOpenAI
+        from services.shared_llm_client import get_http_client
+        load_dotenv()
+        _expansion_llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=0.7,  # Some creativity for variations
+            api_key=os.getenv("OPENAI_API_KEY"),
+            model_kwargs={"response_format": {"type": "json_object"}},  # Always valid JSON
+            http_async_client=get_http_client()  # Shared connection pool
+        )
+    return _expansion_llm
+
+# Follow-up turns in a chat session re-expand the same queries; successful
+# expansions are cached per (normalized query, num_queries). Failed
+# expansions (original-only fallback) are not cached.
+MQE_CACHE_SIZE = int(os.getenv("MQE_CACHE_SIZE", "256"))
+_expansion_cache = LRUCache(maxsize=MQE_CACHE_SIZE)
+
+# Static part of the prompt (no per-query text), sent as the system message
+# so every call shares the same prefix for OpenAI prompt caching; only the
+# short user message changes.
+MQE_SYSTEM_PROMPT = """You generate query variations for the LifeGuard-Pro search.
+
+CONTEXT: LifeGuard-Pro offers 4 main programs:
+1. Water Safety Swim Instructor Certification
+2. Lifeguard Certification (multiple levels)
+3. CPR & First Aid Certification
+4. Certified Pool Operator (CPO)
+
+RULES:
+- If query is GENERAL ("what services", "what courses"): Cover ALL 4 programs
+- If query is SPECIFIC ("what is CPO", "BLS requirements"): Stay focused but vary phrasing
+- Use these strategies:
+  1. Expand acronyms (CPO → Certified Pool Operator)
+  2. Add synonyms (course/training/program/certification)
+  3. Vary specificity (broad → narrow)
+  4. Include related topics (CPO → pool safety)
+
+EXAMPLES:
+
+General: "What courses do you offer?"
+{"queries": [
+  {"query": "full catalog of lifeguard CPR swim instructor and pool operator training", "weight": 1.0},
+  {"query": "available certifications in water safety emergency response and aquatic facility management", "weight": 0.9},
+  {"query": "complete course offerings for lifeguard instructor CPO and first aid training", "weight": 0.85}
+]}
+
+Specific: "What is CPO?"
+{"queries": [
+  {"query": "Certified Pool Operator certification requirements and course details", "weight": 1.0},
+  {"query": "pool operator training program overview and qualifications", "weight": 0.9},
+  {"query": "CPO online certification process content and exam", "weight": 0.85}
+]}"""
 
 
 async def expand_query(
@@ -61,62 +119,30 @@ async def expand_query(
     # Ensure num_queries is reasonable
     num_queries = max(2, min(num_queries, 5))
     
+    cache_key = (query.lower().strip(), num_queries)
+    cached = _expansion_cache.get(cache_key)
+    if cached is not None:
+        logger.debug("MQE: Cache hit (%d query variations)", len(cached))
+        return [dict(q) for q in cached]  # callers may annotate the dicts
+    
     # Phase 2 - P2: Simplified MQE prompt (100 lines → 40 lines)
     prompt = f"""Generate {num_queries} query variations for: "{query}"
 
-CONTEXT: LifeGuard-Pro offers 4 main programs:
-1. Water Safety Swim Instructor Certification
-2. Lifeguard Certification (multiple levels)
-3. CPR & First Aid Certification
-4. Certified Pool Operator (CPO)
-
-RULES:
-- If query is GENERAL ("what services", "what courses"): Cover ALL 4 programs
-- If query is SPECIFIC ("what is CPO", "BLS requirements"): Stay focused but vary phrasing
-- Use these strategies:
-  1. Expand acronyms (CPO → Certified Pool Operator)
-  2. Add synonyms (course/training/program/certification)
-  3. Vary specificity (broad → narrow)
-  4. Include related topics (CPO → pool safety)
-
-EXAMPLES:
-
-General: "What courses do you offer?"
-[
-  {{"query": "full catalog of lifeguard CPR swim instructor and pool operator training", "weight": 1.0}},
-  {{"query": "available certifications in water safety emergency response and aquatic facility management", "weight": 0.9}},
-  {{"query": "complete course offerings for lifeguard instructor CPO and first aid training", "weight": 0.85}}
-]
-
-Specific: "What is CPO?"
-[
-  {{"query": "Certified Pool Operator certification requirements and course details", "weight": 1.0}},
-  {{"query": "pool operator training program overview and qualifications", "weight": 0.9}},
-  {{"query": "CPO online certification process content and exam", "weight": 0.85}}
-]
-
-Output JSON array for: "{query}":"""
+Output a JSON object with key "queries" containing the array for: "{query}"."""
 
     try:
-        # Call LLM
-        response = await expansion_llm.ainvoke(prompt)
-        content = response.content.strip()
-        
-        # Remove markdown formatting if present
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
+        from langchain_core.messages import SystemMessage, HumanMessage
         
-        # Parse JSON
-        expanded = json.loads(content)
+        # Call LLM
+        response = await get_llm().ainvoke([
+            SystemMessage(content=MQE_SYSTEM_PROMPT),
+            HumanMessage(content=prompt)
+        ])
+        expanded = json.loads(response.content).get("queries")
         
         # Validate structure
         if not isinstance(expanded, list):
-            raise ValueError("Expected list of queries")
+            raise ValueError("Expected 'queries' list")
         
         # Ensure each has required fields
         validated = []
@@ -131,10 +157,10 @@ Output JSON array for: "{query}":"""
                 validated.append(item)
         
         # Deduplicate (remove very similar queries)
-        deduplicated = _deduplicate_queries(validated)
+        deduplicated, query_words = _deduplicate_with_words(validated)
         
         # Phase 2 - P5: Validate query quality (filter too-similar expansions)
-        deduplicated = validate_query_quality(query, deduplicated)
+        deduplicated = validate_query_quality(query, deduplicated, query_words)
         
         # Ensure we have at least 2 queries (original + 1 variation)
         if len(deduplicated) < 2:
@@ -145,13 +171,13 @@ Output JSON array for: "{query}":"""
                 "variation_type": "original"
             })
         
-        print(f"     MQE: Generated {len(deduplicated)} query variations (validated)")
+        logger.debug("MQE: Generated %d query variations (validated)", len(deduplicated))
         
+        _expansion_cache.put(cache_key, [dict(q) for q in deduplicated])
         return deduplicated
         
     except Exception as e:
-        print(f"     ⚠️  MQE failed: {e}")
-        print(f"        Falling back to original query only")
+        logger.warning("⚠️ MQE failed: %s - falling back to original query only", e)
         
         # Fallback: return original query only
         return [
@@ -164,38 +190,50 @@ Output JSON array for: "{query}":"""
         ]
 
 
-def _deduplicate_queries(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+async def expand_queries_batch(
+    queries: List[str],
+    num_queries: int = 3
+) -> List[List[Dict[str, Any]]]:
     """
-    Remove semantically very similar queries
+    Expand several queries concurrently (e.g. multiple conversation turns)
     
-    Simple approach: Check if query strings are too similar
-    (More advanced: could use embedding similarity)
+    The LLM calls overlap instead of running back to back; cached queries
+    return immediately.
     
-    Args:
-        queries: List of query objects
-        
     Returns:
-        Deduplicated list
+        One expand_query result per input query, in order
+        
+    Confidence: 90% ✅
     """
+    return list(await asyncio.gather(*(expand_query(q, num_queries) for q in queries)))
+
+
+def _query_words(text: str) -> FrozenSet[str]:
+    """Lowercased word set used by both similarity checks"""
+    return frozenset(text.lower().split())
+
+
+def _deduplicate_with_words(
+    queries: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[FrozenSet[str]]]:
+    """
+    _deduplicate_queries, also returning each kept query's word set so
+    validate_query_quality doesn't tokenize the queries again
+    """
+    query_words = [_query_words(q["query"]) for q in queries]
     if len(queries) <= 2:
-        return queries
+        return queries, query_words
     
     deduplicated = []
+    kept_words = []  # word sets of the kept queries
     
-    for query_obj in queries:
-        query_text = query_obj["query"].lower()
-        
+    for query_obj, words in zip(queries, query_words):
         # Check if too similar to existing queries
         is_duplicate = False
-        for existing in deduplicated:
-            existing_text = existing["query"].lower()
-            
+        for existing_words in kept_words:
             # Simple word overlap check
-            query_words = set(query_text.split())
-            existing_words = set(existing_text.split())
-            
-            overlap = len(query_words & existing_words)
-            total = len(query_words | existing_words)
+            overlap = len(words & existing_words)
+            total = len(words | existing_words)
             
             if total > 0:
                 similarity = overlap / total
@@ -207,13 +245,31 @@ def _deduplicate_queries(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         
         if not is_duplicate:
             deduplicated.append(query_obj)
+            kept_words.append(words)
+    
+    return deduplicated, kept_words
+
+
+def _deduplicate_queries(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Remove semantically very similar queries
     
-    return deduplicated
+    Simple approach: Check if query strings are too similar
+    (More advanced: could use embedding similarity)
+    
+    Args:
+        queries: List of query objects
+        
+    Returns:
+        Deduplicated list
+    """
+    return _deduplicate_with_words(queries)[0]
 
 
 def validate_query_quality(
     original: str,
-    expanded: List[Dict[str, Any]]
+    expanded: List[Dict[str, Any]],
+    query_words: Optional[List[FrozenSet[str]]] = None
 ) -> List[Dict[str, Any]]:
     """
     Validate that expanded queries are actually different and useful
@@ -226,6 +282,8 @@ def validate_query_quality(
     Args:
         original: Original user query
         expanded: List of expanded query objects
+        query_words: Word sets of the expanded queries, if already
+            computed (as returned by _deduplicate_with_words)
         
     Returns:
         Filtered list of validated queries
@@ -234,22 +292,23 @@ def validate_query_quality(
     Phase 2 - P5
     """
     validated = []
-    original_words = set(original.lower().split())
+    original_words = _query_words(original)
+    if query_words is None:
+        query_words = [_query_words(q["query"]) for q in expanded]
     
-    for exp_query in expanded:
+    for exp_query, words in zip(expanded, query_words):
         query_text = exp_query["query"]
-        query_words = set(query_text.lower().split())
         
         # Check word overlap
-        overlap = len(original_words & query_words)
-        total = len(original_words | query_words)
+        overlap = len(original_words & words)
+        total = len(original_words | words)
         similarity = overlap / total if total > 0 else 0
         
         # Keep if adds new information (similarity < 90%)
         if similarity < 0.9:
             validated.append(exp_query)
         else:
-            print(f"     ⚠️  Filtered too-similar expansion: {query_text[:50]}...")
+            logger.debug("Filtered too-similar expansion: %.50s...", query_text)
     
     # Always include at least the original if all were filtered
     if not validated:
@@ -258,7 +317,7 @@ def validate_query_quality(
             "weight": 1.0,
             "variation_type": "original"
         })
-        print(f"     ⚠️  All expansions filtered, using original only")
+        logger.debug("All expansions filtered, using original only")
     
     return validated
 
@@ -338,5 +397,5 @@ def calculate_coverage_score(
     return coverage
 
 
-__all__ = ['expand_query', 'calculate_coverage_score', 'validate_query_quality']
+__all__ = ['expand_query', 'expand_queries_batch', 'calculate_coverage_score', 'validate_query_quality']
 
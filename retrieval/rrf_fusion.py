@@ -19,16 +19,30 @@ Example:
     - BM25 rank 3 → RRF += 1/(60+3) = 0.0159
     - Vector rank 5 → RRF += 1/(60+5) = 0.0154
     - Total RRF = 0.0313 ← High score (in both methods!)
+
+Vector results' "embedding" (unit-norm float32, see vector_search) is
+carried over unchanged; mmr_select relies on it being normalized.
 """
 
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+import heapq
+import numpy as np
+
+# 1/(k + rank) for ranks 1..4096 at the default k=60 (zip() stops at the
+# shorter input, so no slicing is needed)
+_DEFAULT_K = 60
+_RRF_WEIGHTS_DEFAULT_K = (1.0 / (_DEFAULT_K + np.arange(1, 4097))).tolist()
 
 
 def rrf_fusion(
     bm25_results: List[Dict[str, Any]],
     vector_results: List[Dict[str, Any]],
-    k: int = 60
+    k: int = 60,
+    top_n: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Merge BM25 and Vector results using Reciprocal Rank Fusion
@@ -42,9 +56,13 @@ def rrf_fusion(
         bm25_results: Results from BM25 search
         vector_results: Results from vector search
         k: RRF constant (default 60)
+        top_n: Only return the top_n fused chunks (partial heap selection
+               instead of a full sort); None returns all
         
     Returns:
-        Fused results sorted by RRF score (DESC)
+        Fused results sorted by RRF score (DESC). The first dict seen for
+        each chunk is annotated in place (no copies), so the input dicts
+        gain rrf_score / found_in_methods.
         
     Example:
         bm25 = [chunk_1, chunk_2, chunk_3, ...]
@@ -66,43 +84,44 @@ def rrf_fusion(
     rrf_scores = {}
     chunk_data = {}
     
-    # Process BM25 results
-    for rank, result in enumerate(bm25_results, start=1):
+    # 1/(k + rank) for every rank, shared by both lists (module-level
+    # table for the default k; computed here otherwise)
+    longest = max(len(bm25_results), len(vector_results))
+    if k == _DEFAULT_K and longest <= len(_RRF_WEIGHTS_DEFAULT_K):
+        rank_weights = _RRF_WEIGHTS_DEFAULT_K
+    else:
+        rank_weights = (1.0 / (k + np.arange(1, longest + 1))).tolist()
+    
+    # BM25 then Vector results in one pass, tagged with their source
+    tagged_results = chain(
+        (("bm25", result, weight) for result, weight in zip(bm25_results, rank_weights)),
+        (("vector", result, weight) for result, weight in zip(vector_results, rank_weights))
+    )
+    
+    for source, result, weight in tagged_results:
         chunk_id = result.get("chunk_id")
         
         if chunk_id is None:
             continue
         
         # Add to RRF score
-        rrf_scores[chunk_id] = rrf_scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+        rrf_scores[chunk_id] = rrf_scores.get(chunk_id, 0.0) + weight
         
         # Store chunk data (if not already stored)
-        if chunk_id not in chunk_data:
-            chunk_data[chunk_id] = result.copy()
-        else:
-            # Merge: add BM25 score
-            chunk_data[chunk_id]["bm25_score"] = result.get("bm25_score")
-    
-    # Process Vector results
-    for rank, result in enumerate(vector_results, start=1):
-        chunk_id = result.get("chunk_id")
-        
-        if chunk_id is None:
+        chunk = chunk_data.setdefault(chunk_id, result)
+        if chunk is result:
             continue
         
-        # Add to RRF score
-        rrf_scores[chunk_id] = rrf_scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
-        
-        # Store chunk data (if not already stored)
-        if chunk_id not in chunk_data:
-            chunk_data[chunk_id] = result.copy()
+        if source == "bm25":
+            # Merge: add BM25 score
+            chunk["bm25_score"] = result.get("bm25_score")
         else:
             # Merge: add Vector score and embedding
-            chunk_data[chunk_id]["vector_score"] = result.get("vector_score")
+            chunk["vector_score"] = result.get("vector_score")
             
             # Keep embedding (needed for MMR)
             if "embedding" in result:
-                chunk_data[chunk_id]["embedding"] = result["embedding"]
+                chunk["embedding"] = result["embedding"]
     
     # Step 2: Create fused results with RRF scores
     fused_results = []
@@ -124,7 +143,10 @@ def rrf_fusion(
         fused_results.append(chunk)
     
     # Step 3: Sort by RRF score (descending)
-    fused_results.sort(key=lambda x: x["rrf_score"], reverse=True)
+    if top_n is not None:
+        # Same order as sort()[:top_n], in O(n log top_n)
+        return heapq.nlargest(top_n, fused_results, key=itemgetter("rrf_score"))
+    fused_results.sort(key=itemgetter("rrf_score"), reverse=True)
     
     return fused_results
 
@@ -176,7 +198,8 @@ def analyze_rrf_distribution(fused_results: List[Dict[str, Any]]) -> Dict[str, A
 def rrf_fusion_unified(
     bm25_results: Dict[str, List[Dict[str, Any]]],
     vector_results: Dict[str, List[Dict[str, Any]]],
-    k: int = 60
+    k: int = 60,
+    top_n: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Merge BM25 and Vector results from unified search (website + internal)
@@ -188,12 +211,13 @@ def rrf_fusion_unified(
         bm25_results: Dict with 'combined' list from bm25_search_unified
         vector_results: Dict with 'combined' list from vector_search_unified
         k: RRF constant (default 60)
+        top_n: Only return the top_n fused chunks (None = all)
         
     Returns:
         Fused results sorted by RRF score with source attribution
         
     Example:
-        bm25 = bm25_search_unified("CPR training")
+        bm25 = await bm25_search_unified("CPR training")
         vector = await vector_search_unified("CPR training")
         fused = rrf_fusion_unified(bm25, vector)
         
@@ -205,18 +229,15 @@ def rrf_fusion_unified(
     vector_combined = vector_results.get('combined', [])
     
     # Use regular RRF fusion
-    fused = rrf_fusion(bm25_combined, vector_combined, k=k)
-    
-    # Ensure source_type is preserved (it should already be in the results)
-    # Add source statistics
-    source_counts = {}
-    for chunk in fused:
-        source = chunk.get('source_type', 'unknown')
-        source_counts[source] = source_counts.get(source, 0) + 1
+    fused = rrf_fusion(bm25_combined, vector_combined, k=k, top_n=top_n)
     
-    # Add metadata about source distribution
+    # Add metadata about source distribution (source_type should already be
+    # in the results). Counted on the fused list, not the inputs: chunks
+    # found by both methods count once and top_n cuts are excluded.
     if fused:
-        fused[0]['_source_distribution'] = source_counts
+        fused[0]['_source_distribution'] = dict(
+            Counter(chunk.get('source_type', 'unknown') for chunk in fused)
+        )
     
     return fused
 
@@ -10,6 +10,10 @@ Why Vector Search:
 
 Confidence: 92% ✅
 
+Embeddings in the results are pgvector float32 arrays and already
+L2-normalized (text-embedding-3-small returns unit vectors): rrf_fusion
+passes them through and mmr_select uses plain dot products as cosine.
+
 Example:
     results = await vector_search("What is CPO?", limit=20)
     # Returns chunks ranked by cosine similarity
@@ -19,6 +23,7 @@ from typing import List, Dict, Any
 import os
 import sys
 from pathlib import Path
+import numpy as np
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -26,7 +31,19 @@ load_dotenv()
 
 # Import database connection
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from config.database import get_connection
+from config.database import get_async_pool, set_hnsw_ef_search_async
+from config.rag_config import get_config
+
+# HNSW search breadth (see migrations/001_hnsw_vector_indexes.sql)
+_HNSW_EF_SEARCH = get_config("vector").get("hnsw_ef_search", 40)
+
+# Document fields: copied onto chunks (migrations/002) or joined from documents
+if get_config("vector").get("denormalized_chunks"):
+    _DOC_SOURCE = "chunks c"
+    _DOC_FIELDS = "c.title as document_title, c.url as document_url, c.document_type"
+else:
+    _DOC_SOURCE = "chunks c LEFT JOIN documents d ON c.document_id = d.document_id"
+    _DOC_FIELDS = "d.title as document_title, d.url as document_url, d.document_type"
 
 # OpenAI client for embeddings
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -59,7 +76,7 @@ async def vector_search(
                 "content": str,
                 "vector_score": float,  # Similarity (0.0 to 1.0)
                 "distance": float,      # Cosine distance
-                "embedding": List[float],  # Only if include_embeddings=True
+                "embedding": np.ndarray,  # float32, unit-norm; only if include_embeddings=True
                 "document_id": int,
                 "document_title": str,
                 "document_url": str,
@@ -80,32 +97,33 @@ async def vector_search(
             model="text-embedding-3-small"
         )
         
-        query_embedding = embedding_response.data[0].embedding
+        # float32 array → sent binary through the pgvector adapter
+        query_embedding = np.asarray(embedding_response.data[0].embedding, dtype=np.float32)
         
         # Step 2: Vector search in PostgreSQL
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.transaction(), conn.cursor() as cursor:
+                await set_hnsw_ef_search_async(cursor, max(_HNSW_EF_SEARCH, limit))
+                
                 # pgvector similarity search
                 # <=> means cosine distance in pgvector
-                cursor.execute("""
+                await cursor.execute(f"""
                     SELECT 
                         c.id,
                         c.content,
                         c.document_id,
                         c.chunk_index,
-                        d.title as document_title,
-                        d.url as document_url,
-                        d.document_type,
-                        c.embedding <=> %s::vector as distance,
+                        {_DOC_FIELDS},
+                        c.embedding <=> %s as distance,
                         c.embedding
-                    FROM chunks c
-                    LEFT JOIN documents d ON c.document_id = d.document_id
+                    FROM {_DOC_SOURCE}
                     WHERE c.embedding IS NOT NULL
                     ORDER BY distance ASC
                     LIMIT %s
-                """, (query_embedding, limit))
+                """, (query_embedding, limit), prepare=True)
                 
-                rows = cursor.fetchall()
+                rows = await cursor.fetchall()
                 
                 # Step 3: Format results
                 chunks = []
@@ -199,11 +217,15 @@ async def vector_search_internal(
             model="text-embedding-3-small"
         )
         
-        query_embedding = embedding_response.data[0].embedding
+        # float32 array → sent binary through the pgvector adapter
+        query_embedding = np.asarray(embedding_response.data[0].embedding, dtype=np.float32)
         
         # Step 2: Vector search in internal_chunks
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.transaction(), conn.cursor() as cursor:
+                await set_hnsw_ef_search_async(cursor, max(_HNSW_EF_SEARCH, limit))
+                
                 # Build query with optional document_type filter
                 base_query = """
                     SELECT 
@@ -214,7 +236,7 @@ async def vector_search_internal(
                         ic.document_type,
                         id.title as document_title,
                         id.source_file,
-                        ic.embedding <=> %s::vector as distance,
+                        ic.embedding <=> %s as distance,
                         ic.embedding
                     FROM internal_chunks ic
                     LEFT JOIN internal_documents id ON ic.document_id = id.document_id
@@ -231,8 +253,8 @@ async def vector_search_internal(
                 base_query += " ORDER BY distance ASC LIMIT %s"
                 params.append(limit)
                 
-                cursor.execute(base_query, params)
-                rows = cursor.fetchall()
+                await cursor.execute(base_query, params, prepare=True)
+                rows = await cursor.fetchall()
                 
                 # Step 3: Format results
                 chunks = []
@@ -9,6 +9,7 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 from langchain_openai import ChatOpenAI
+from services.shared_llm_client import get_http_client
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 import os
 from dotenv import load_dotenv
@@ -32,7 +33,8 @@ class LLMClient:
         self.llm = ChatOpenAI(
             model=model,
             temperature=temperature,
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=get_http_client()  # Shared connection pool
         )
         self.model_name = model
     
@@ -0,0 +1,98 @@
+"""
+Shared HTTP client for ChatOpenAI instances
+
+Confidence: 90% ✅
+
+Every lazily-created ChatOpenAI otherwise builds its own httpx AsyncClient,
+so each node pays its own TCP/TLS handshakes and keeps a separate pool.
+Passing this one client via `http_async_client=` lets every LLM call on
+the request path (guardrail, intent, planner, RAG expansion, responders)
+share keep-alive connections (and HTTP/2 multiplexing when the `h2`
+package is installed).
+
+Pooled connections belong to the event loop that opened them, and the
+same ChatOpenAI singletons run on several loops (the API loop, the
+nodes._utils.run_sync background loop, asyncio.run() in scripts). The
+client therefore sends through _PerLoopTransport, which keeps one
+connection pool per running loop; a loop's pool is dropped with the loop.
+
+Limitations:
+- close_http_client() closes the calling loop's pool; other loops' pools
+  are released when those loops are garbage-collected
+"""
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Room for the gather() fan-outs (MQE, batch guardrails) without
+# dropping warm connections between bursts (per loop)
+_LIMITS = httpx.Limits(max_connections=128, max_keepalive_connections=64)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """Dispatches each request to a connection pool owned by the running loop"""
+
+    def __init__(self):
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()  # loops run on different threads
+
+    def _transport(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=_LIMITS, http2=HTTP2_AVAILABLE)
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            transport = self._transports.pop(loop, None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the process-wide httpx AsyncClient (lazy initialization)
+
+    Returns:
+        httpx.AsyncClient: Pooled client to pass as ChatOpenAI(http_async_client=...)
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(transport=_PerLoopTransport())
+        logger.info("Shared LLM HTTP client initialized (http2=%s)", HTTP2_AVAILABLE)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared client (e.g. on application shutdown; see Limitations)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+__all__ = [
+    'get_http_client',
+    'close_http_client'
+]
@@ -0,0 +1,56 @@
+"""Keyword fast path of intent classification (no LLM call)"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from nodes.intent import quick_intent_hint
+
+
+# Informational questions that happen to contain booking/pricing-ish words:
+# these must go to the LLM, not be short-circuited
+@pytest.mark.parametrize("text", [
+    "I want to know what the CPO course covers",
+    "What's the schedule for lifeguard classes?",
+    "Can I join the instructor as an observer?",
+    "Do you offer CPR for kids? I'm ready to learn more",
+    "Is there a book I need for the WSI course?",
+    "Is the exam fee included in the course?",
+    "Do you take $ or card at the pool?",
+    "How much time does the lifeguard course take?",
+    "How do I get started as a lifeguard?",
+])
+def test_ambiguous_wording_defers_to_llm(text):
+    assert quick_intent_hint(text) is None
+
+
+@pytest.mark.parametrize("text", [
+    "How much is the lifeguard certification?",
+    "What's the price for CPR training?",
+    "What does the CPO course cost?",
+    "Do you have group rates for 10 people?",
+    "Any discounts for students?",
+])
+def test_pricing_phrases(text):
+    assert quick_intent_hint(text) == "PRICING"
+
+
+@pytest.mark.parametrize("text", [
+    "I'd like to register for the lifeguard course",
+    "Sign me up for CPR",
+    "How do I enroll?",
+    "Can you book me into Saturday's class?",
+    "I want to reserve a spot in the WSI class",
+])
+def test_booking_phrases(text):
+    assert quick_intent_hint(text) == "BOOKING"
+
+
+def test_pricing_wins_over_booking():
+    assert quick_intent_hint("How much is it to register?") == "PRICING"
+
+
+def test_no_partial_word_matches():
+    assert quick_intent_hint("Is the training priceless?") is None
+    assert quick_intent_hint("Who is the registrar?") is None
@@ -213,7 +213,10 @@ def rag_search_sync(query: str) -> str:
         
     Returns:
         str: Comprehensive context with links
+    
+    Runs on the shared background loop (nodes._utils.run_sync), so the
+    async DB pool opened there is reused across calls.
     """
-    import asyncio
-    return asyncio.run(rag_search.ainvoke({"query": query}))
+    from nodes._utils import run_sync
+    return run_sync(rag_search.ainvoke({"query": query}))
 
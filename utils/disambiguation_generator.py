@@ -8,6 +8,7 @@ Confidence: 90% ✅
 """
 from typing import Dict, Any, List, Optional
 from langchain_openai import ChatOpenAI
+from services.shared_llm_client import get_http_client
 from langchain_core.messages import SystemMessage, HumanMessage
 import os
 from dotenv import load_dotenv
@@ -24,7 +25,8 @@ def get_disambiguation_llm():
         _disambiguation_llm = ChatOpenAI(
             model="gpt-4o",
             temperature=0.7,  # Slightly creative for engaging descriptions
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=get_http_client()  # Shared connection pool
         )
     return _disambiguation_llm
 
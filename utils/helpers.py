@@ -10,14 +10,23 @@ Includes:
 """
 import re
 import json
+import hashlib
 from typing import Optional, Dict
 from langchain_openai import ChatOpenAI
+from services.shared_llm_client import get_http_client
 from langchain_core.messages import SystemMessage, HumanMessage
+from nodes.embedding_cache import LRUCache
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# sha256(raw input) → cleaned JSON answer, so the same message is never
+# extracted twice (retries, re-entered nodes, repeated turns). Only
+# parseable LLM answers are cached; each hit is parsed into fresh objects.
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "512"))
+_extraction_cache = LRUCache(maxsize=EXTRACTION_CACHE_SIZE)
+
 # Lazy initialization for LLM
 _extraction_llm = None
 
@@ -28,7 +37,8 @@ def get_extraction_llm():
         _extraction_llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0,
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_async_client=get_http_client()  # Shared connection pool
         )
     return _extraction_llm
 
@@ -90,6 +100,11 @@ async def extract_user_info_llm(text: str) -> Dict:
             "feedback": str | None
         }
     """
+    key = hashlib.sha256(text.encode()).hexdigest()
+    cached = _extraction_cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+    
     try:
         llm = get_extraction_llm()
         
@@ -116,6 +131,7 @@ async def extract_user_info_llm(text: str) -> Dict:
         
         # Parse JSON response
         result = json.loads(content)
+        _extraction_cache.put(key, content)
         
         return result
         